@@ -0,0 +1,122 @@
+import hashlib
+import os
+import struct
+from array import array
+from typing import Dict, Optional
+from fraction import Fraction
+
+_MAGIC = b'AKC1'
+_HEADER = struct.Struct('<4sQ')
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# 分母的特殊取值：题目无法计算 / 数值超出int64范围需要重新计算
+_INVALID = 0
+_UNCACHED = -1
+
+
+class AnswerKeyCache:
+    """
+    题目文件的标准答案缓存
+
+    以题目文件内容的SHA-256为键，每个题目文件对应一个二进制缓存文件，
+    内容为 (题号, 分子, 分母) 的int64三元组数组。题目文件一旦改动，
+    哈希随之改变，旧缓存自然失效，并在超过数量上限时按最近使用时间清理。
+    """
+
+    def __init__(self, cache_dir: str = '.answer_cache', max_entries: int = 64):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 最多保留的缓存文件数量
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        """计算文件内容的哈希"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f'{digest}.key')
+
+    def load(self, digest: str) -> Optional[Dict[int, Optional[Fraction]]]:
+        """
+        读取缓存的标准答案
+
+        Args:
+            digest: 题目文件哈希
+
+        Returns:
+            {题号: 标准答案}，无法计算的题目为None；数值过大未缓存的题目不在结果中；
+            缓存不存在或损坏时返回None
+        """
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                magic, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                values = array('q')
+                values.fromfile(f, count * 3)
+        except (OSError, EOFError, struct.error):
+            return None
+
+        # 更新访问时间，用于按最近使用清理
+        os.utime(path)
+
+        answer_key = {}
+        for i in range(0, len(values), 3):
+            idx, numerator, denominator = values[i], values[i + 1], values[i + 2]
+            if denominator == _INVALID:
+                answer_key[idx] = None
+            elif denominator != _UNCACHED:
+                answer_key[idx] = Fraction._from_reduced(numerator, denominator)
+        return answer_key
+
+    def store(self, digest: str, answer_key: Dict[int, Optional[Fraction]]):
+        """
+        保存标准答案
+
+        Args:
+            digest: 题目文件哈希
+            answer_key: {题号: 标准答案}，无法计算的题目为None
+        """
+        values = array('q')
+        for idx, answer in answer_key.items():
+            if not _INT64_MIN <= idx <= _INT64_MAX:
+                continue
+            if answer is None:
+                values.extend((idx, 0, _INVALID))
+            elif (_INT64_MIN <= answer.numerator <= _INT64_MAX and
+                  answer.denominator <= _INT64_MAX):
+                values.extend((idx, answer.numerator, answer.denominator))
+            else:
+                values.extend((idx, 0, _UNCACHED))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(digest)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(values) // 3))
+            values.tofile(f)
+        os.replace(temp_path, path)
+
+        self._evict()
+
+    def _evict(self):
+        """缓存文件超过上限时删除最久未使用的文件"""
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if name.endswith('.key')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            os.remove(path)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+性能基准测试
+用法:
+  python benchmark.py parallel -n 100000 -r 10 -j 8   测试并行生成的加速比
+  python benchmark.py fraction -n 200000 -r 10        对比分数类的运算性能
+  python benchmark.py suite                           运行基准测试套件并与基线对比
+  python benchmark.py suite --save-baseline           运行套件并保存为新的基线
+
+仓库中的 benchmark_baseline.json 是引入套件时（优化之前）的树上记录的结果，
+吞吐量与机器有关，换机器对比前应在旧版本上重新 --save-baseline。
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import fractions
+from typing import Callable, Dict, List, Tuple
+from fraction import Fraction
+from generator import ProblemGenerator
+from checker import AnswerChecker
+from writer import ProblemWriter
+from postfix import get_codec
+
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+MEMORY_SLACK_KB = 64  # 峰值内存的绝对容差，避免几KB的基准因微小波动被判为回退
+
+
+class _LegacyFraction:
+    """重构前的分数类（每个实例带 __dict__，每次运算都完整构造并约分），仅用于对比"""
+
+    def __init__(self, numerator, denominator=1):
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        self.numerator = numerator
+        self.denominator = denominator
+        self._simplify()
+
+    def _simplify(self):
+        if self.numerator == 0:
+            self.denominator = 1
+            return
+        gcd_val = math.gcd(abs(self.numerator), self.denominator)
+        self.numerator //= gcd_val
+        self.denominator //= gcd_val
+
+    def __add__(self, other):
+        return _LegacyFraction(self.numerator * other.denominator + other.numerator * self.denominator,
+                               self.denominator * other.denominator)
+
+    def __sub__(self, other):
+        return _LegacyFraction(self.numerator * other.denominator - other.numerator * self.denominator,
+                               self.denominator * other.denominator)
+
+    def __mul__(self, other):
+        return _LegacyFraction(self.numerator * other.numerator, self.denominator * other.denominator)
+
+    def __truediv__(self, other):
+        return _LegacyFraction(self.numerator * other.denominator, self.denominator * other.numerator)
+
+
+def _operand_pairs(count: int, number_range: int):
+    """按生成器的分布（60%整数，40%真分数）生成操作数对"""
+    rng = random.Random(0)
+
+    def leaf():
+        if rng.random() < 0.6:
+            return rng.randint(0, number_range - 1), 1
+        denominator = rng.randint(2, number_range)
+        return rng.randint(1, denominator - 1), denominator
+
+    return [(leaf(), leaf(), rng.choice('+-*/')) for _ in range(count)]
+
+
+def bench_fraction(count: int, number_range: int):
+    """
+    在生成器的运算分布上对比三种分数实现的耗时
+
+    Args:
+        count: 运算次数
+        number_range: 数值范围
+    """
+    pairs = _operand_pairs(count, number_range)
+    implementations = [
+        ('legacy', _LegacyFraction),
+        ('fraction.Fraction', Fraction),
+        ('fractions.Fraction', fractions.Fraction),
+    ]
+    operations = {
+        '+': lambda a, b: a + b,
+        '-': lambda a, b: a - b,
+        '*': lambda a, b: a * b,
+        '/': lambda a, b: a / b,
+    }
+
+    print(f"\n分数运算基准: {count} 次运算，数值范围 {number_range}")
+    print(f"{'实现':>20} {'耗时(秒)':>10} {'次/秒':>12}")
+    for name, cls in implementations:
+        operands = [(cls(*a), cls(*b), operations[op]) for a, b, op in pairs
+                    if not (op == '/' and b[0] == 0)]
+        start_time = time.perf_counter()
+        for a, b, operation in operands:
+            operation(a, b)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>20} {elapsed:>10.3f} {len(operands) / elapsed:>12,.0f}")
+
+
+def bench_parallel_generation(count: int, number_range: int, max_workers: int):
+    """
+    测试不同进程数下构造式生成的耗时和加速比，以串行生成为基准
+
+    Args:
+        count: 题目数量
+        number_range: 数值范围
+        max_workers: 最大进程数
+    """
+    worker_counts = []
+    workers = 1
+    while workers < max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(max_workers)
+
+    results = []
+    for workers in worker_counts:
+        # 默认模式的尝试预算固定为 max_retry_count，大量生成时使用构造式生成
+        generator = ProblemGenerator(number_range, constructive=True)
+        start_time = time.perf_counter()
+        # 单进程时走真正的串行路径，而不是只有一个工作进程的进程池
+        problems = generator._generate(count, workers)
+        elapsed = time.perf_counter() - start_time
+        results.append((workers, len(problems), elapsed))
+
+    base_time = results[0][2]
+    print(f"\n并行生成基准: -n {count} -r {number_range}")
+    print(f"{'进程数':>6} {'题目数':>8} {'耗时(秒)':>10} {'加速比':>8} {'效率':>8}")
+    for workers, generated, elapsed in results:
+        speedup = base_time / elapsed
+        print(f"{workers:>6} {generated:>8} {elapsed:>10.2f} {speedup:>8.2f} {speedup / workers:>8.0%}")
+
+
+def _measure(func: Callable[[], int]) -> Tuple[float, int]:
+    """
+    运行一次基准函数，记录耗时和峰值内存
+
+    先不开启内存跟踪计时，再在 tracemalloc 下运行一次取峰值内存，
+    避免内存跟踪拖慢计时结果。
+
+    Args:
+        func: 基准函数，返回处理的条目数
+
+    Returns:
+        (每秒处理条目数, 峰值内存字节数)
+    """
+    start_time = time.perf_counter()
+    items = func()
+    elapsed = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return items / elapsed, peak
+
+
+def _write_synthetic_files(directory: str, lines: int) -> Tuple[str, str]:
+    """生成指定行数的题目和答案文件"""
+    exercise_file = os.path.join(directory, f'Exercises_{lines}.txt')
+    answer_file = os.path.join(directory, f'Answers_{lines}.txt')
+    generator = ProblemGenerator(100, constructive=True)
+    writer = ProblemWriter(exercise_file, answer_file)
+    writer.prepare()
+    writer.write(generator.iter_problems(lines))
+    return exercise_file, answer_file
+
+
+def run_suite(full: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    运行基准测试套件
+
+    Args:
+        full: 是否包含100万行的批改测试
+
+    Returns:
+        {基准名称: {'throughput': 每秒条目数, 'peak_kb': 峰值内存KB}}
+    """
+    benchmarks: List[Tuple[str, Callable[[], int]]] = []
+
+    pairs = _operand_pairs(200000, 10)
+    operands = [(Fraction(*a), Fraction(*b), op) for a, b, op in pairs if not (op == '/' and b[0] == 0)]
+
+    def fraction_ops():
+        for a, b, op in operands:
+            if op == '+':
+                a + b
+            elif op == '-':
+                a - b
+            elif op == '*':
+                a * b
+            else:
+                a / b
+        return len(operands)
+
+    benchmarks.append(('fraction_ops', fraction_ops))
+
+    for count, number_range in [(1000, 10), (10000, 10), (10000, 100)]:
+        def generate(count=count, number_range=number_range):
+            generator = ProblemGenerator(number_range, seed=0)
+            generator.max_retry_count = count * 10
+            return len(generator.generate_problems(count))
+
+        benchmarks.append((f'generate_n{count}_r{number_range}', generate))
+
+    expression_generator = ProblemGenerator(10, seed=0)
+    expressions = [expression_generator.generate_single_expression(3) for _ in range(20000)]
+
+    def normalized_form():
+        for expr in expressions:
+            expr.normalized_form()
+        return len(expressions)
+
+    benchmarks.append(('normalized_form', normalized_form))
+
+    # 去重键的完整开销：由后缀形式重新构建表达式树（与生成时一样自底向上）并取规范键
+    codec = get_codec(10)
+    codes = [codec.encode(expr) for expr in expressions]
+
+    def canonical_key():
+        for code in codes:
+            codec.decode(code).canonical_key
+        return len(codes)
+
+    benchmarks.append(('build_canonical_key', canonical_key))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        line_counts = [10000, 100000] + ([1000000] if full else [])
+        for lines in line_counts:
+            exercise_file, answer_file = _write_synthetic_files(directory, lines)
+
+            def check(exercise_file=exercise_file, answer_file=answer_file):
+                return AnswerChecker().check_answers(exercise_file, answer_file)['total_count']
+
+            benchmarks.append((f'check_answers_{lines}', check))
+
+        for name, func in benchmarks:
+            throughput, peak = _measure(func)
+            results[name] = {'throughput': throughput, 'peak_kb': peak / 1024}
+            print(f"{name:>24} {throughput:>14,.0f} 条/秒 {peak / 1024:>12,.0f} KB")
+
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                          tolerance: float) -> List[str]:
+    """
+    与基线对比，找出性能回退的基准
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对偏差，如0.2表示吞吐量下降或内存增长超过20%视为回退
+            （内存另有 MEMORY_SLACK_KB 的绝对容差）
+
+    Returns:
+        回退描述列表
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if result['throughput'] < expected['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: 吞吐量 {result['throughput']:,.0f} 低于基线 {expected['throughput']:,.0f}")
+        if result['peak_kb'] > expected['peak_kb'] * (1 + tolerance) + MEMORY_SLACK_KB:
+            regressions.append(f"{name}: 峰值内存 {result['peak_kb']:,.0f} KB 高于基线 {expected['peak_kb']:,.0f} KB")
+    return regressions
+
+
+def bench_suite(full: bool, baseline_file: str, save_baseline: bool, tolerance: float) -> int:
+    """
+    运行套件并与基线对比
+
+    Returns:
+        退出码，存在性能回退时为1
+    """
+    print(f"{'基准':>24} {'吞吐量':>18} {'峰值内存':>15}")
+    results = run_suite(full)
+
+    if save_baseline:
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\n基线已保存到: {baseline_file}")
+        return 0
+
+    if not os.path.exists(baseline_file):
+        print(f"\n基线文件不存在: {baseline_file}，使用 --save-baseline 生成")
+        return 0
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, tolerance)
+    if regressions:
+        print("\n发现性能回退:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\n未发现性能回退")
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='四则运算题目生成器性能基准测试')
+    subparsers = parser.add_subparsers(dest='benchmark')
+
+    parallel_parser = subparsers.add_parser('parallel', help='并行生成加速比')
+    parallel_parser.add_argument('-n', type=int, default=100000, help='题目数量')
+    parallel_parser.add_argument('-r', type=int, default=10, help='数值范围')
+    parallel_parser.add_argument('-j', type=int, default=os.cpu_count() or 1, help='最大进程数')
+
+    fraction_parser = subparsers.add_parser('fraction', help='分数运算性能对比')
+    fraction_parser.add_argument('-n', type=int, default=200000, help='运算次数')
+    fraction_parser.add_argument('-r', type=int, default=10, help='数值范围')
+
+    suite_parser = subparsers.add_parser('suite', help='基准测试套件')
+    suite_parser.add_argument('--full', action='store_true', help='包含100万行的批改测试')
+    suite_parser.add_argument('--baseline', default=DEFAULT_BASELINE_FILE, help='基线文件路径')
+    suite_parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    suite_parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对偏差（默认0.2）')
+
+    args = parser.parse_args()
+    if args.benchmark == 'suite':
+        sys.exit(bench_suite(args.full, args.baseline, args.save_baseline, args.tolerance))
+    elif args.benchmark == 'parallel':
+        bench_parallel_generation(args.n, args.r, args.j)
+    elif args.benchmark == 'fraction':
+        bench_fraction(args.n, args.r)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,167 @@
+import os
 import re
-from typing import List, Tuple, Dict, Any
+import shutil
+import multiprocessing
+import tempfile
+from collections import deque
+from itertools import zip_longest
+from typing import List, Tuple, Dict, Any, Optional
 from fraction import Fraction
+from answer_cache import AnswerKeyCache
+import expr_parser
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时批量比较退化为纯Python实现
+    np = None
+
+_LINE_PATTERN = re.compile(r'(\d+)\.\s*(.+)')
+_DECIMAL_PATTERN = re.compile(r'([+-]?)(\d*)\.(\d*)')
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# 流式批改时允许等待答案的题目数量，在此范围内的乱序答案仍能正确配对
+_STREAM_WINDOW = 1000
+
+
+def _compare_fraction_arrays(std_num: List[int], std_den: List[int],
+                             stu_num: List[int], stu_den: List[int]):
+    """
+    批量比较两组分数是否相等
+
+    分数均为最简形式且分母为正，相等当且仅当分子、分母分别相等。
+    有NumPy时转换为int64数组一次性比较；超出int64范围的元素改用Python大整数比较。
+
+    Returns:
+        每个位置是否相等的掩码（有NumPy时为布尔数组，否则为列表）
+    """
+    if np is None:
+        return [a == c and b == d for a, b, c, d in zip(std_num, std_den, stu_num, stu_den)]
+
+    # 超出int64范围的元素先置零，稍后单独比较；先用 min/max 判断，通常无需逐个检查
+    overflow = []
+    if any(values and (min(values) < _INT64_MIN or max(values) > _INT64_MAX)
+           for values in (std_num, std_den, stu_num, stu_den)):
+        overflow = [i for i, values in enumerate(zip(std_num, std_den, stu_num, stu_den))
+                    if any(v < _INT64_MIN or v > _INT64_MAX for v in values)]
+    std_num_big, std_den_big, stu_num_big, stu_den_big = std_num, std_den, stu_num, stu_den
+    if overflow:
+        std_num, std_den, stu_num, stu_den = (list(values) for values in (std_num, std_den, stu_num, stu_den))
+        for i in overflow:
+            std_num[i] = std_den[i] = stu_num[i] = stu_den[i] = 0
+
+    equal = ((np.array(std_num, dtype=np.int64) == np.array(stu_num, dtype=np.int64)) &
+             (np.array(std_den, dtype=np.int64) == np.array(stu_den, dtype=np.int64)))
+
+    for i in overflow:
+        equal[i] = (std_num_big[i] == stu_num_big[i] and std_den_big[i] == stu_den_big[i])
+    return equal
+
+
+def _grade_chunk(task: Tuple[List[Tuple[int, str, Optional[str]]], Optional[Dict[int, Optional[Fraction]]]]) -> List[bool]:
+    """
+    并行批改的工作进程函数
+
+    Args:
+        task: ((题号, 题目, 学生答案) 列表, 这些题目的标准答案缓存)，
+            没有答案时学生答案为None，未使用标准答案缓存时缓存为None
+
+    Returns:
+        每道题是否正确
+    """
+    triples, answer_key = task
+    checker = AnswerChecker()
+    checker._answer_key = answer_key
+    return [student_answer is not None and checker._check_single_exercise(exercise, student_answer, idx)
+            for idx, exercise, student_answer in triples]
+
+
+def _submission_names(answer_files: List[str]) -> List[str]:
+    """
+    为每份答案文件生成互不相同的名称
+
+    Args:
+        answer_files: 答案文件路径列表
+
+    Returns:
+        与 answer_files 一一对应的名称列表
+    """
+    if not answer_files:
+        return []
+    paths = [os.path.abspath(path) for path in answer_files]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    names = []
+    seen = {}
+    for answer_file, path in zip(answer_files, paths):
+        name = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '_')
+        if name in seen:
+            raise ValueError(f"答案文件名称重复: {seen[name]} 与 {answer_file}")
+        seen[name] = answer_file
+        names.append(name)
+    return names
+
+
+class _IndexSpool:
+    """把题号分块写入临时文件，使批改结果的内存占用与题目数量无关"""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._buffer: List[str] = []
+        self._file = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def add(self, index: int):
+        self._buffer.append(str(index))
+        self.count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._file.tell() > 0:
+            self._file.write(', ')
+        self._file.write(', '.join(self._buffer))
+        self._buffer = []
+
+    def copy_to(self, output):
+        """按块把题号列表复制到输出文件"""
+        self._flush()
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, output)
+
+    def close(self):
+        self._file.close()
+
 
 class AnswerChecker:
     """答案批改器，检查答案的正确性"""
     
-    def __init__(self):
+    def __init__(self, answer_cache: Optional[AnswerKeyCache] = None):
+        """
+        初始化批改器
+        
+        Args:
+            answer_cache: 标准答案缓存，同一题目文件多次批改时不再重复计算
+        """
         self.correct_count = 0
         self.wrong_count = 0
         self.correct_indices = []
         self.wrong_indices = []
+        self.answer_cache = answer_cache
+        self._answer_key: Optional[Dict[int, Optional[Fraction]]] = None  # 当前题目文件的标准答案
     
-    def check_answers(self, exercise_file: str, answer_file: str) -> Dict[str, Any]:
+    def check_answers(self, exercise_file: str, answer_file: str, vectorized: bool = False,
+                      workers: int = 1) -> Dict[str, Any]:
         """
         批改答案
         
         Args:
             exercise_file: 题目文件路径
             answer_file: 答案文件路径
+            vectorized: 是否使用批量比较（有NumPy时使用整数数组），只用于单进程批改
+            workers: 工作进程数，大于1时使用多进程并行批改
             
         Returns:
             批改结果统计
@@ -39,7 +183,16 @@ class AnswerChecker:
             if len(exercises) != len(answers):
                 print(f"警告: 题目数量({len(exercises)})和答案数量({len(answers)})不匹配")
             
+            # 读取或建立标准答案缓存
+            self._answer_key = None
+            if self.answer_cache is not None:
+                self._answer_key = self._load_answer_key(exercise_file, exercises)
+            
             # 批改每道题目
+            if workers > 1:
+                return self._grade_exercises_parallel(exercises, answers, workers)
+            if vectorized:
+                return self._grade_exercises_vectorized(exercises, answers)
             return self._grade_exercises(exercises, answers)
             
         except FileNotFoundError as e:
@@ -58,18 +211,11 @@ class AnswerChecker:
             解析后的题目列表
         """
         exercises = []
-        pattern = r'(\d+)\.\s*(.+)'
         
         for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            match = re.match(pattern, line)
-            if match:
-                index = int(match.group(1))
-                exercise = match.group(2).rstrip('=').strip()
-                exercises.append((index, exercise))
+            exercise = self._parse_exercise_line(line)
+            if exercise:
+                exercises.append(exercise)
         
         return exercises
     
@@ -84,21 +230,151 @@ class AnswerChecker:
             解析后的答案列表
         """
         answers = []
-        pattern = r'(\d+)\.\s*(.+)'
         
         for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            match = re.match(pattern, line)
-            if match:
-                index = int(match.group(1))
-                answer = match.group(2).strip()
-                answers.append((index, answer))
+            answer = self._parse_answer_line(line)
+            if answer:
+                answers.append(answer)
         
         return answers
     
+    def _parse_exercise_line(self, line: Optional[str]) -> Optional[Tuple[int, str]]:
+        """解析题目文件中的一行，无法解析时返回None"""
+        if not line:
+            return None
+        match = _LINE_PATTERN.match(line.strip())
+        if not match:
+            return None
+        return int(match.group(1)), match.group(2).rstrip('=').strip()
+    
+    def _parse_answer_line(self, line: Optional[str]) -> Optional[Tuple[int, str]]:
+        """解析答案文件中的一行，无法解析时返回None"""
+        if not line:
+            return None
+        match = _LINE_PATTERN.match(line.strip())
+        if not match:
+            return None
+        return int(match.group(1)), match.group(2).strip()
+    
+    def check_answers_streaming(self, exercise_file: str, answer_file: str,
+                                output_file: str = "Grade.txt", chunk_size: int = 10000) -> Dict[str, Any]:
+        """
+        流式批改答案，内存占用与文件大小无关
+        
+        同时逐行读取题目文件和答案文件。题号对齐时直接批改，不建立索引；
+        不对齐时只缓存尚未配对的行，已批改的题目只保留题号和结果。
+        答案文件的题号递增时，等待中的题目超过 _STREAM_WINDOW 道且已读到更大的答案题号，
+        即认定最早的未配对题目没有答案，因此缺少个别答案也不会使缓存增长。
+        批改结果按题目文件顺序分块写入输出文件，内容与 check_answers 后调用 save_grade_result 的结果一致。
+        
+        Args:
+            exercise_file: 题目文件路径
+            answer_file: 答案文件路径
+            output_file: 批改结果文件路径
+            chunk_size: 每次写出的题号数量
+            
+        Returns:
+            批改结果统计（不含题号列表）
+        """
+        correct = _IndexSpool(chunk_size)
+        wrong = _IndexSpool(chunk_size)
+        # 尚未写出的题目，按题目文件顺序排列: [题号, 题目, 是否正确(未批改为None)]
+        queue: deque = deque()
+        pending_exercises: Dict[int, list] = {}
+        pending_answers: Dict[int, str] = {}
+        total_count = 0
+        # 已读到的最后一个答案题号，以及答案题号是否一直递增
+        last_answer_idx = 0
+        answers_ascending = True
+        
+        def record(idx: int, is_correct: bool):
+            if is_correct:
+                correct.add(idx)
+            else:
+                wrong.add(idx)
+        
+        def flush_queue():
+            while queue:
+                entry = queue[0]
+                if entry[2] is None:
+                    # 答案题号递增且已远超该题，不会再读到它的答案
+                    if not (answers_ascending and last_answer_idx > entry[0] and len(queue) > _STREAM_WINDOW):
+                        break
+                    del pending_exercises[entry[0]]
+                    entry[2] = False
+                queue.popleft()
+                record(entry[0], entry[2])
+        
+        try:
+            with open(exercise_file, 'r', encoding='utf-8') as ef, \
+                    open(answer_file, 'r', encoding='utf-8') as af:
+                for exercise_line, answer_line in zip_longest(ef, af):
+                    exercise = self._parse_exercise_line(exercise_line)
+                    answer = self._parse_answer_line(answer_line)
+                    
+                    if exercise:
+                        total_count += 1
+                    if answer:
+                        if answer[0] <= last_answer_idx:
+                            answers_ascending = False
+                        last_answer_idx = answer[0]
+                    
+                    # 快速路径：题号对齐且没有等待中的题目，直接批改
+                    if exercise and answer and exercise[0] == answer[0] and not queue:
+                        record(exercise[0], self._check_single_exercise(exercise[1], answer[1]))
+                        continue
+                    
+                    if exercise:
+                        idx, text = exercise
+                        entry = [idx, text, None]
+                        queue.append(entry)
+                        if idx in pending_answers:
+                            entry[2] = self._check_single_exercise(text, pending_answers.pop(idx))
+                            entry[1] = None
+                        else:
+                            pending_exercises[idx] = entry
+                    
+                    if answer:
+                        idx, text = answer
+                        if idx in pending_exercises:
+                            entry = pending_exercises.pop(idx)
+                            entry[2] = self._check_single_exercise(entry[1], text)
+                            entry[1] = None
+                        else:
+                            pending_answers[idx] = text
+                    
+                    flush_queue()
+            
+            # 没有对应答案的题目标记为错误
+            for entry in queue:
+                record(entry[0], entry[2] is True)
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(f"Correct: {correct.count} (")
+                correct.copy_to(f)
+                f.write(f")\nWrong: {wrong.count} (")
+                wrong.copy_to(f)
+                f.write(")")
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"文件不存在: {e.filename}")
+        except Exception as e:
+            raise Exception(f"批改过程中发生错误: {e}")
+        finally:
+            correct.close()
+            wrong.close()
+        
+        self.correct_count = correct.count
+        self.wrong_count = wrong.count
+        self.correct_indices = []
+        self.wrong_indices = []
+        
+        return {
+            'correct_count': correct.count,
+            'wrong_count': wrong.count,
+            'total_count': total_count,
+            'output_file': output_file
+        }
+    
     def _grade_exercises(self, exercises: List[Tuple[int, str]], answers: List[Tuple[int, str]]) -> Dict[str, Any]:
         """
         批改题目
@@ -126,7 +402,7 @@ class AnswerChecker:
                 continue
             
             student_answer = answer_dict[idx]
-            is_correct = self._check_single_exercise(exercise, student_answer)
+            is_correct = self._check_single_exercise(exercise, student_answer, idx)
             
             if is_correct:
                 self.correct_count += 1
@@ -143,20 +419,192 @@ class AnswerChecker:
             'total_count': len(exercises)
         }
     
-    def _check_single_exercise(self, exercise: str, student_answer: str) -> bool:
+    def _grade_exercises_parallel(self, exercises: List[Tuple[int, str]], answers: List[Tuple[int, str]],
+                                  workers: int, chunk_size: int = 5000) -> Dict[str, Any]:
+        """
+        使用进程池并行批改题目，结果与 _grade_exercises 完全一致
+        
+        把题目与对应答案配对后按顺序切块，各块在进程池中批改，
+        再按块的原始顺序合并正确和错误题号。使用标准答案缓存时，
+        每块附带其题目的标准答案，工作进程不再重新计算。
+        
+        Args:
+            exercises: 题目列表
+            answers: 答案列表
+            workers: 工作进程数
+            chunk_size: 每块的题目数量
+            
+        Returns:
+            批改结果
+        """
+        answer_dict = {idx: ans for idx, ans in answers}
+        triples = [(idx, exercise, answer_dict.get(idx)) for idx, exercise in exercises]
+        chunks = []
+        for i in range(0, len(triples), chunk_size):
+            chunk = triples[i:i + chunk_size]
+            answer_key = None
+            if self._answer_key is not None:
+                answer_key = {idx: self._answer_key[idx] for idx, _, _ in chunk if idx in self._answer_key}
+            chunks.append((chunk, answer_key))
+        
+        self.correct_indices = []
+        self.wrong_indices = []
+        with multiprocessing.Pool(workers) as pool:
+            position = 0
+            for results in pool.imap(_grade_chunk, chunks):
+                for is_correct in results:
+                    idx = exercises[position][0]
+                    if is_correct:
+                        self.correct_indices.append(idx)
+                    else:
+                        self.wrong_indices.append(idx)
+                    position += 1
+        
+        self.correct_count = len(self.correct_indices)
+        self.wrong_count = len(self.wrong_indices)
+        
+        return {
+            'correct_count': self.correct_count,
+            'wrong_count': self.wrong_count,
+            'correct_indices': self.correct_indices,
+            'wrong_indices': self.wrong_indices,
+            'total_count': len(exercises)
+        }
+    
+    def _grade_exercises_vectorized(self, exercises: List[Tuple[int, str]],
+                                    answers: List[Tuple[int, str]]) -> Dict[str, Any]:
+        """
+        批量批改题目，结果与 _grade_exercises 一致
+        
+        先把每道题的标准答案和学生答案解析为并行的分子/分母数组，
+        再一次性比较，正确和错误题号由比较结果掩码得到。
+        
+        Args:
+            exercises: 题目列表
+            answers: 答案列表
+            
+        Returns:
+            批改结果
+        """
+        answer_dict = {idx: ans for idx, ans in answers}
+        indices = []
+        std_num, std_den, stu_num, stu_den = [], [], [], []
+        
+        for idx, exercise in exercises:
+            indices.append(idx)
+            try:
+                if idx not in answer_dict:
+                    raise KeyError(idx)
+                standard_answer = self._standard_answer(exercise, idx)
+                student_answer = self._parse_student_answer(answer_dict[idx])
+            except KeyError:
+                # 没有对应答案，分母置0使比较结果为错误
+                standard_answer = student_answer = None
+            except Exception as e:
+                print(f"批改题目时发生错误: {exercise} -> {answer_dict[idx]}, 错误: {e}")
+                standard_answer = student_answer = None
+            
+            if standard_answer is None:
+                std_num.append(0)
+                std_den.append(0)
+                stu_num.append(0)
+                stu_den.append(1)
+            else:
+                std_num.append(standard_answer.numerator)
+                std_den.append(standard_answer.denominator)
+                stu_num.append(student_answer.numerator)
+                stu_den.append(student_answer.denominator)
+        
+        equal = _compare_fraction_arrays(std_num, std_den, stu_num, stu_den)
+        
+        if np is not None:
+            index_array = np.array(indices, dtype=object)
+            self.correct_indices = index_array[equal].tolist()
+            self.wrong_indices = index_array[~equal].tolist()
+        else:
+            self.correct_indices = [idx for idx, is_correct in zip(indices, equal) if is_correct]
+            self.wrong_indices = [idx for idx, is_correct in zip(indices, equal) if not is_correct]
+        self.correct_count = len(self.correct_indices)
+        self.wrong_count = len(self.wrong_indices)
+        
+        return {
+            'correct_count': self.correct_count,
+            'wrong_count': self.wrong_count,
+            'correct_indices': self.correct_indices,
+            'wrong_indices': self.wrong_indices,
+            'total_count': len(exercises)
+        }
+    
+    def _load_answer_key(self, exercise_file: str,
+                         exercises: List[Tuple[int, str]]) -> Dict[int, Optional[Fraction]]:
+        """
+        读取题目文件的标准答案缓存，缓存不存在时计算并保存
+        
+        Args:
+            exercise_file: 题目文件路径
+            exercises: 解析后的题目列表
+            
+        Returns:
+            {题号: 标准答案}，无法计算的题目为None
+        """
+        digest = self.answer_cache.file_digest(exercise_file)
+        answer_key = self.answer_cache.load(digest)
+        if answer_key is not None:
+            return answer_key
+        
+        answer_key = self._build_answer_key(exercises)
+        self.answer_cache.store(digest, answer_key)
+        return answer_key
+    
+    def _build_answer_key(self, exercises: List[Tuple[int, str]]) -> Dict[int, Optional[Fraction]]:
+        """计算每道题的标准答案，题号重复的题目不放入结果，批改时逐题计算"""
+        answer_key = {}
+        duplicates = set()
+        for idx, exercise in exercises:
+            if idx in answer_key:
+                duplicates.add(idx)
+                continue
+            try:
+                answer_key[idx] = self._calculate_expression(exercise)
+            except Exception:
+                answer_key[idx] = None
+        for idx in duplicates:
+            del answer_key[idx]
+        return answer_key
+    
+    def _standard_answer(self, exercise: str, idx: Optional[int] = None) -> Fraction:
+        """
+        获取标准答案，有缓存时直接读取
+        
+        Args:
+            exercise: 题目表达式
+            idx: 题号
+            
+        Returns:
+            标准答案
+        """
+        if self._answer_key is not None and idx in self._answer_key:
+            standard_answer = self._answer_key[idx]
+            if standard_answer is None:
+                raise ValueError("题目无法计算")
+            return standard_answer
+        return self._calculate_expression(exercise)
+    
+    def _check_single_exercise(self, exercise: str, student_answer: str, idx: Optional[int] = None) -> bool:
         """
         检查单个题目的答案
         
         Args:
             exercise: 题目表达式
             student_answer: 学生答案
+            idx: 题号，用于查找缓存的标准答案
             
         Returns:
             答案是否正确
         """
         try:
             # 计算标准答案
-            standard_answer = self._calculate_expression(exercise)
+            standard_answer = self._standard_answer(exercise, idx)
             
             # 解析学生答案
             student_answer_parsed = self._parse_student_answer(student_answer)
@@ -178,37 +626,8 @@ class AnswerChecker:
         Returns:
             计算结果
         """
-        # 移除空格并替换运算符
-        expr = expression.replace(' ', '').replace('×', '*').replace('÷', '/')
-        
-        # 安全地计算表达式
-        try:
-            # 这里可以使用更安全的表达式求值方法
-            # 为了简单起见，我们使用eval，但在生产环境中应该使用更安全的方法
-            from utils import safe_eval
-            result = safe_eval(expr)
-            return result
-        except:
-            # 如果安全求值失败，使用备用方法
-            return self._calculate_expression_backup(expression)
-    
-    def _calculate_expression_backup(self, expression: str) -> Fraction:
-        """
-        备用表达式计算方法
-        
-        Args:
-            expression: 表达式字符串
-            
-        Returns:
-            计算结果
-        """
-        # 简单的递归下降解析器实现
-        # 这里实现一个简化版的表达式解析
-        # 实际项目中应该实现完整的表达式解析器
-        
-        # 临时解决方案：使用ProblemGenerator重新生成表达式并计算
-        # 这需要重构代码，这里先返回一个默认值
-        return Fraction(0, 1)
+        # 解析为表达式树后用分数精确计算，不经过eval和浮点数
+        return expr_parser.evaluate(expression)
     
     def _parse_student_answer(self, answer: str) -> Fraction:
         """
@@ -230,13 +649,11 @@ class AnswerChecker:
             if answer.isdigit() or (answer.startswith('-') and answer[1:].isdigit()):
                 return Fraction(int(answer), 1)
             
-            # 处理小数答案（如果有）
-            if '.' in answer:
-                try:
-                    from fractions import Fraction as PyFraction
-                    return Fraction.from_float(float(answer))
-                except:
-                    pass
+            # 处理小数答案：由数字串精确换算为分数，不经过浮点数
+            match = _DECIMAL_PATTERN.fullmatch(answer)
+            if match and (match.group(2) or match.group(3)):
+                sign, whole, decimals = match.groups()
+                return Fraction(int(f"{sign}{whole}{decimals}"), 10 ** len(decimals))
             
             raise ValueError(f"无法解析答案: {answer}")
     
@@ -247,11 +664,88 @@ class AnswerChecker:
         Args:
             output_file: 输出文件路径
         """
+        result = self._write_grade_file(output_file)
+        
+        print(f"批改结果已保存到: {output_file}")
+        print(result)
+    
+    def _write_grade_file(self, output_file: str) -> str:
+        """按 Grade.txt 格式写出当前批改结果，返回写出的内容"""
         result = f"Correct: {self.correct_count} ({', '.join(map(str, self.correct_indices))})\n"
         result += f"Wrong: {self.wrong_count} ({', '.join(map(str, self.wrong_indices))})"
         
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(result)
         
-        print(f"批改结果已保存到: {output_file}")
-        print(result)
+        return result
+    
+    def check_submissions(self, exercise_file: str, answer_files: List[str],
+                          output_dir: str = '.') -> Dict[str, Any]:
+        """
+        用同一份题目批改多份答案
+        
+        题目文件只解析和计算一次，每份答案写出一个 Grade_<名称>.txt，
+        另外写出按题统计正确率的 Report.txt。名称取答案文件相对于所有答案文件
+        公共目录的路径（去掉扩展名，目录分隔符替换为下划线），
+        因此 subs/alice/Answers.txt 与 subs/bob/Answers.txt 分别得到 alice_Answers 和 bob_Answers。
+        
+        Args:
+            exercise_file: 题目文件路径
+            answer_files: 答案文件路径列表
+            output_dir: 批改结果输出目录
+            
+        Returns:
+            {'submissions': {名称: 批改结果}, 'question_accuracy': {题号: 正确率},
+             'report_file': 报告文件路径}
+            
+        Raises:
+            ValueError: 两份答案文件得到相同的名称
+        """
+        names = _submission_names(answer_files)
+        
+        try:
+            with open(exercise_file, 'r', encoding='utf-8') as f:
+                exercises = self._parse_exercises(f.readlines())
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"文件不存在: {e.filename}")
+        
+        if self.answer_cache is not None:
+            self._answer_key = self._load_answer_key(exercise_file, exercises)
+        else:
+            self._answer_key = self._build_answer_key(exercises)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        correct_by_question = dict.fromkeys((idx for idx, _ in exercises), 0)
+        submissions = {}
+        
+        try:
+            for answer_file, name in zip(answer_files, names):
+                with open(answer_file, 'r', encoding='utf-8') as f:
+                    answers = self._parse_answers(f.readlines())
+                
+                result = self._grade_exercises(exercises, answers)
+                result['output_file'] = os.path.join(output_dir, f"Grade_{name}.txt")
+                self._write_grade_file(result['output_file'])
+                submissions[name] = result
+                
+                for idx in self.correct_indices:
+                    correct_by_question[idx] += 1
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"文件不存在: {e.filename}")
+        finally:
+            self._answer_key = None
+        
+        count = len(answer_files)
+        question_accuracy = {idx: (correct / count if count else 0.0)
+                             for idx, correct in correct_by_question.items()}
+        report_file = os.path.join(output_dir, "Report.txt")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(f"Submissions: {count}\n")
+            for idx, correct in correct_by_question.items():
+                f.write(f"{idx}. {correct}/{count} ({question_accuracy[idx] * 100:.1f}%)\n")
+        
+        return {
+            'submissions': submissions,
+            'question_accuracy': question_accuracy,
+            'report_file': report_file
+        }
@@ -0,0 +1,146 @@
+import math
+import random
+from typing import Iterator, List, Tuple
+from fraction import Fraction
+from expression import Expression
+
+OPERATORS = ['+', '-', '×', '÷']
+COMMUTATIVE_OPERATORS = ('+', '×')
+
+
+def leaf_values(number_range: int) -> List[Fraction]:
+    """
+    列出数值范围内所有可能的叶子值
+
+    Args:
+        number_range: 数值范围（整数不包括该值，真分数分母最大为该值）
+
+    Returns:
+        整数 0..number_range-1 和所有最简真分数，顺序固定
+    """
+    values = [Fraction(i, 1) for i in range(number_range)]
+    for denominator in range(2, number_range + 1):
+        for numerator in range(1, denominator):
+            if math.gcd(numerator, denominator) == 1:
+                values.append(Fraction(numerator, denominator))
+    return values
+
+
+def _is_canonical_chain(left: Expression, right: Expression, operator: str) -> bool:
+    """
+    可交换运算只保留每个规范键的唯一代表形式，与去重规则一致：
+    运算链向左展开（右操作数不是同一运算），且链上的操作数按规范键从小到大排列
+    """
+    if right.operator == operator:
+        return False
+    # 左操作数是同一运算时，与链上最后一个操作数比较
+    previous = left.right if left.operator == operator else left
+    return previous.canonical_key <= right.canonical_key
+
+
+def _enumerate_trees(leaves: List[Expression], operator_count: int) -> Iterator[Expression]:
+    """按固定顺序生成指定运算符数量的所有规范、合法的表达式"""
+    if operator_count == 0:
+        yield from leaves
+        return
+
+    for left_op_count in range(operator_count):
+        right_op_count = operator_count - 1 - left_op_count
+        for left in _enumerate_trees(leaves, left_op_count):
+            left_val = left.evaluate()
+            # 右子树每次重新生成而不缓存，内存占用只与树的深度有关
+            for right in _enumerate_trees(leaves, right_op_count):
+                right_val = right.evaluate()
+                for operator in OPERATORS:
+                    if operator in COMMUTATIVE_OPERATORS and not _is_canonical_chain(left, right, operator):
+                        continue
+                    if operator == '-' and left_val < right_val:
+                        continue
+                    if operator == '÷' and right_val.numerator == 0:
+                        continue
+                    yield Expression(left=left, right=right, operator=operator)
+
+
+def enumerate_expressions(number_range: int, max_operators: int = 3,
+                          min_operators: int = 1) -> Iterator[Expression]:
+    """
+    惰性枚举数值范围内所有不重复的合法表达式
+
+    按运算符数量从少到多、顺序固定地逐个产生表达式，每个规范键只出现一次。
+    产生的表达式之间共享子树，应视为只读。
+
+    Args:
+        number_range: 数值范围
+        max_operators: 最大运算符数量
+        min_operators: 最小运算符数量
+
+    Returns:
+        表达式迭代器
+    """
+    leaves = [Expression(value=value) for value in leaf_values(number_range)]
+    for operator_count in range(min_operators, max_operators + 1):
+        yield from _enumerate_trees(leaves, operator_count)
+
+
+def count_expressions(number_range: int, max_operators: int = 3) -> int:
+    """
+    统计题目空间的大小
+
+    Args:
+        number_range: 数值范围
+        max_operators: 最大运算符数量
+
+    Returns:
+        不重复的合法表达式数量
+    """
+    return sum(1 for _ in enumerate_expressions(number_range, max_operators))
+
+
+def space_size_bound(number_range: int, max_operators: int = 3) -> int:
+    """
+    不枚举地估计题目空间大小的上界，用于判断能否枚举全部题目
+
+    叶子数按未约分的真分数计，每种运算符数量的树形为卡特兰数，不考虑去重和非法表达式。
+
+    Args:
+        number_range: 数值范围
+        max_operators: 最大运算符数量
+
+    Returns:
+        题目数量的上界
+    """
+    leaf_count = number_range + number_range * (number_range - 1) // 2
+    return sum(math.comb(2 * k, k) // (k + 1) * len(OPERATORS) ** k * leaf_count ** (k + 1)
+               for k in range(1, max_operators + 1))
+
+
+def sample_expressions(number_range: int, count: int, max_operators: int = 3,
+                       rng: random.Random = None) -> Tuple[List[Expression], int]:
+    """
+    从题目空间中均匀、无拒绝地抽取表达式（蓄水池抽样）
+
+    Args:
+        number_range: 数值范围
+        count: 抽取数量，超过题目空间大小时返回全部
+        max_operators: 最大运算符数量
+        rng: 随机数生成器，默认使用 random 模块
+
+    Returns:
+        (按枚举顺序排列的表达式列表, 题目空间大小)
+    """
+    from postfix import get_codec
+    
+    rng = rng or random
+    codec = get_codec(number_range)
+    # 蓄水池中只保存紧凑的后缀形式，抽取结束后再还原为表达式
+    reservoir = []
+    seen = -1
+    for seen, expr in enumerate(enumerate_expressions(number_range, max_operators)):
+        if seen < count:
+            reservoir.append((seen, codec.encode(expr)))
+        else:
+            slot = rng.randint(0, seen)
+            if slot < count:
+                reservoir[slot] = (seen, codec.encode(expr))
+    reservoir.sort(key=lambda item: item[0])
+    return [codec.decode(code) for _, code in reservoir], seen + 1
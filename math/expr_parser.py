@@ -0,0 +1,151 @@
+import re
+from typing import List, Tuple, Union
+from fraction import Fraction
+from expression import Expression, _apply_operator
+
+# 数值: 带分数 a^b/c、真分数 b/c 或整数；运算符: + - × ÷ ( )，兼容 *
+_TOKEN_PATTERN = re.compile(r'\s*(?:(\d+)\^(\d+)/(\d+)|(\d+)/(\d+)|(\d+)|([-+×÷*()]))')
+
+_NUMBER = 'num'
+_OPERATOR = 'op'
+_END = (None, None)
+
+
+def tokenize(text: str) -> List[Tuple[str, object]]:
+    """
+    将表达式字符串切分为记号
+
+    Args:
+        text: 表达式字符串，如 "2^1/2 - 1/2 × (3 + 1)"
+
+    Returns:
+        (类型, 值) 记号列表，数值记号的值为分数对象
+    """
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+
+    while position < end:
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise ValueError(f"表达式包含非法字符: {text[position:].strip()}")
+
+        whole, mixed_num, mixed_den, num, den, integer, operator = match.groups()
+        if operator is not None:
+            tokens.append((_OPERATOR, '×' if operator == '*' else operator))
+        elif integer is not None:
+            tokens.append((_NUMBER, Fraction._from_reduced(int(integer), 1)))
+        elif num is not None:
+            tokens.append((_NUMBER, Fraction(int(num), int(den))))
+        else:
+            tokens.append((_NUMBER, Fraction(int(mixed_num), int(mixed_den), int(whole))))
+        position = match.end()
+
+    return tokens
+
+
+class _Parser:
+    """
+    按运算符优先级构建表达式树的递归下降解析器
+
+    build 为 False 时不构建表达式树，解析过程中直接计算分数，
+    用于只需要结果的批改；两种方式的运算规则相同。
+    """
+
+    def __init__(self, tokens: List[Tuple[str, object]], build: bool = True):
+        # 末尾追加结束记号，取下一个记号时不必检查越界
+        self.tokens = tokens + [_END]
+        self.position = 0
+        self.build = build
+
+    def _peek(self):
+        return self.tokens[self.position]
+
+    def parse(self) -> Union[Expression, Fraction]:
+        expr = self._parse_sum()
+        if self.position != len(self.tokens) - 1:
+            raise ValueError(f"表达式中存在多余的记号: {self._peek()[1]}")
+        return expr
+
+    def _parse_sum(self) -> Union[Expression, Fraction]:
+        """加减法（低优先级，左结合）"""
+        expr = self._parse_product()
+        kind, value = self._peek()
+        while kind == _OPERATOR and value in ('+', '-'):
+            self.position += 1
+            right = self._parse_product()
+            if self.build:
+                expr = Expression(left=expr, right=right, operator=value)
+            else:
+                expr = _apply_operator(value, expr, right)
+            kind, value = self._peek()
+        return expr
+
+    def _parse_product(self) -> Union[Expression, Fraction]:
+        """乘除法（高优先级，左结合）"""
+        expr = self._parse_atom()
+        kind, value = self._peek()
+        while kind == _OPERATOR and value in ('×', '÷'):
+            self.position += 1
+            right = self._parse_atom()
+            if self.build:
+                expr = Expression(left=expr, right=right, operator=value)
+            else:
+                expr = _apply_operator(value, expr, right)
+            kind, value = self._peek()
+        return expr
+
+    def _parse_atom(self) -> Union[Expression, Fraction]:
+        """数值或括号表达式"""
+        kind, value = self._peek()
+        if kind == _NUMBER:
+            self.position += 1
+            return Expression(value=value) if self.build else value
+        if kind == _OPERATOR and value == '(':
+            self.position += 1
+            expr = self._parse_sum()
+            if self._peek() != (_OPERATOR, ')'):
+                raise ValueError("括号不匹配")
+            self.position += 1
+            return expr
+        if kind is None:
+            raise ValueError("表达式不完整")
+        raise ValueError(f"意外的记号: {value}")
+
+
+def _strip_equals(text: str) -> str:
+    text = text.strip()
+    if text.endswith('='):
+        text = text[:-1]
+    return text
+
+
+def parse(text: str) -> Expression:
+    """
+    将题目字符串解析为表达式树
+
+    Args:
+        text: 题目字符串，末尾的 "=" 会被忽略
+
+    Returns:
+        表达式对象
+    """
+    return _Parser(tokenize(_strip_equals(text))).parse()
+
+
+def evaluate(text: str) -> Fraction:
+    """
+    解析并精确计算题目字符串的值
+
+    Args:
+        text: 题目字符串
+
+    Returns:
+        计算结果
+
+    Raises:
+        NegativeResultError: 减法结果为负数
+        DivisionByZeroError: 除数为零
+    """
+    # 不构建表达式树，解析时直接计算
+    return _Parser(tokenize(_strip_equals(text)), build=False).parse()
@@ -1,82 +1,395 @@
-from typing import List, Union, Optional
+import weakref
+from typing import Iterator, List, Union, Optional
 import random
 from fraction import Fraction
 
+# 运算符编码，在规范键和后缀形式中以相反数出现
+OPERATOR_CODES = {'+': 1, '-': 2, '×': 3, '÷': 4}
+COMMUTATIVE_CODES = (OPERATOR_CODES['+'], OPERATOR_CODES['×'])
+
+class NegativeResultError(ValueError):
+    """减法结果为负数"""
+
+
+class DivisionByZeroError(ValueError):
+    """除数为零"""
+
+
 class Expression:
     """表达式类，表示一个四则运算表达式"""
     
     def __init__(self, value=None, left=None, right=None, operator=None):
-        self.left = left  # 左子表达式
-        self.right = right  # 右子表达式
-        self.operator = operator  # 运算符
-        self.value = value  # 如果是叶子节点，存储数值
+        self._parent = None  # 父节点的弱引用，用于沿路径使缓存失效
+        self._left = left  # 左子表达式
+        self._right = right  # 右子表达式
+        self._operator = operator  # 运算符
+        self._value = value  # 如果是叶子节点，存储数值
+        self._cached_value = None  # 已计算的表达式值
+        self._canonical_key = None  # 已计算的结构规范键
+        # 子节点只保存父节点的弱引用，树中不形成引用环，丢弃的表达式由引用计数立即回收
+        if left is not None or right is not None:
+            parent = weakref.ref(self)
+            for child in (left, right):
+                if child is not None:
+                    child._parent = parent
+        # 自底向上构建时直接由子节点的键组合出本节点的键，之后去重时不需要遍历
+        if left is None:
+            if value is not None:
+                self._canonical_key = canonical_leaf_key(value)
+        elif operator is not None and left._canonical_key is not None and right._canonical_key is not None:
+            self._canonical_key = combine_canonical_keys(OPERATOR_CODES[operator], left._canonical_key,
+                                                         right._canonical_key)
+    
+    @property
+    def left(self) -> Optional['Expression']:
+        return self._left
+    
+    @left.setter
+    def left(self, expr: Optional['Expression']):
+        self._left = self._adopt(self._left, expr)
+    
+    @property
+    def right(self) -> Optional['Expression']:
+        return self._right
+    
+    @right.setter
+    def right(self, expr: Optional['Expression']):
+        self._right = self._adopt(self._right, expr)
+    
+    @property
+    def operator(self) -> Optional[str]:
+        return self._operator
+    
+    @operator.setter
+    def operator(self, operator: Optional[str]):
+        self._operator = operator
+        self._invalidate()
+    
+    @property
+    def value(self) -> Optional[Fraction]:
+        return self._value
+    
+    @value.setter
+    def value(self, value: Optional[Fraction]):
+        self._value = value
+        self._invalidate()
+    
+    @property
+    def canonical_key(self) -> Optional[tuple]:
+        """结构规范键，用于去重；自底向上构建时在构造中得到，修改子表达式后重新计算并缓存"""
+        if self._canonical_key is None:
+            left, right = self._left, self._right
+            if left is None or (left._canonical_key is not None and right._canonical_key is not None):
+                self._canonical_key = self._build_canonical_key()
+            else:
+                self._compute_canonical_keys()
+        return self._canonical_key
+    
+    def swap_operands(self):
+        """交换左右子表达式"""
+        self._left, self._right = self._right, self._left
+        self._invalidate()
+    
+    def _adopt(self, old: Optional['Expression'], new: Optional['Expression']) -> Optional['Expression']:
+        """替换子表达式并使本节点到根节点路径上的缓存失效"""
+        if old is not None and old._parent is not None and old._parent() is self:
+            old._parent = None
+        if new is not None:
+            new._parent = weakref.ref(self)
+        self._invalidate()
+        return new
+    
+    def _invalidate(self):
+        """清除本节点及其所有祖先的缓存，兄弟子树的缓存保持不变"""
+        node = self
+        while node is not None:
+            node._cached_value = None
+            node._canonical_key = None
+            parent = node._parent
+            node = parent() if parent is not None else None
         
     def is_leaf(self) -> bool:
-        return self.left is None and self.right is None
+        return self._left is None and self._right is None
     
-    def evaluate(self) -> Fraction:
-        """计算表达式的值"""
-        if self.is_leaf():
-            return self.value
+    def _iter_postorder(self, is_done) -> Iterator['Expression']:
+        """
+        在显式栈上后序遍历（子节点先于父节点），不使用递归
         
-        left_val = self.left.evaluate()
-        right_val = self.right.evaluate()
+        Args:
+            is_done: 判断节点是否已有结果的函数，已有结果的子树整棵跳过
+        """
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                yield node
+            elif not is_done(node):
+                stack.append((node, True))
+                if node._left is not None:
+                    stack.append((node._right, False))
+                    stack.append((node._left, False))
+    
+    def evaluate(self) -> Fraction:
+        """计算表达式的值，子表达式的值只计算一次并缓存"""
+        if self._cached_value is not None:
+            return self._cached_value
+        if self._left is None:
+            return self._value
+        try:
+            return _evaluate_shallow(self, 0)
+        except _TooDeep:
+            pass
         
-        if self.operator == '+':
-            return left_val + right_val
-        elif self.operator == '-':
-            # 确保不产生负数
-            if left_val < right_val:
-                raise ValueError("减法结果不能为负数")
-            return left_val - right_val
-        elif self.operator == '×':
-            return left_val * right_val
-        elif self.operator == '÷':
-            if right_val.numerator == 0:
-                raise ValueError("除数不能为零")
-            return left_val / right_val
-        else:
-            raise ValueError(f"未知运算符: {self.operator}")
+        for node in self._iter_postorder(_has_value):
+            left, right = node._left, node._right
+            left_val = left._value if left._left is None else left._cached_value
+            right_val = right._value if right._left is None else right._cached_value
+            node._cached_value = _apply_operator(node._operator, left_val, right_val)
+        return self._cached_value
     
     def to_string(self, parent_priority: int = 0) -> str:
         """将表达式转换为字符串"""
-        if self.is_leaf():
-            return self.value.to_string()
-        
-        # 定义运算符优先级
-        priorities = {'+': 1, '-': 1, '×': 2, '÷': 2}
-        current_priority = priorities[self.operator]
+        try:
+            return _render_shallow(self, parent_priority, 0)
+        except _TooDeep:
+            pass
         
-        left_str = self.left.to_string(current_priority)
-        right_str = self.right.to_string(current_priority)
-        
-        # 根据优先级决定是否加括号
-        expr_str = f"{left_str} {self.operator} {right_str}"
-        if current_priority < parent_priority:
-            expr_str = f"({expr_str})"
-        
-        return expr_str
+        # 深层表达式在显式栈上输出，不受递归深度限制
+        parts = []
+        # 栈中为待输出的字符串或 (子表达式, 外层优先级)
+        stack = [(self, parent_priority)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            node, outer_priority = item
+            if node.is_leaf():
+                parts.append(node._value.to_string())
+                continue
+            
+            current_priority = _PRIORITIES[node._operator]
+            # 右侧同级子表达式只有同为 + 或 × 时才省略括号，
+            # 否则 1 + (2 - 1) 会写成与 (1 + 2) - 1 相同的 1 + 2 - 1
+            if node._operator in _COMMUTATIVE_OPERATORS and node._right._operator == node._operator:
+                right_priority = current_priority
+            else:
+                right_priority = current_priority + 1
+            # 根据优先级决定是否加括号，按输出的逆序入栈
+            parenthesize = current_priority < outer_priority
+            if parenthesize:
+                stack.append(')')
+            stack.append((node._right, right_priority))
+            stack.append(f" {node._operator} ")
+            stack.append((node._left, current_priority))
+            if parenthesize:
+                stack.append('(')
+        return ''.join(parts)
     
     def __str__(self) -> str:
         return self.to_string()
     
     def normalized_form(self) -> str:
-        """生成规范化形式用于去重比较"""
-        if self.is_leaf():
-            return self.value.to_string()
+        """
+        生成规范化形式用于去重比较
         
-        left_norm = self.left.normalized_form()
-        right_norm = self.right.normalized_form()
+        + 和 × 的连续运算展开为一组操作数并排序，因此交换律和结合律变换
+        得到的表达式规范化形式相同，如 (1+2)+3、1+(3+2) 均为 (1+2+3)。
+        """
+        try:
+            return _normalize_shallow(self, 0)[0]
+        except _TooDeep:
+            pass
         
-        # 对于可交换的运算符，排序子表达式
-        if self.operator in ['+', '×']:
-            if left_norm > right_norm:
-                left_norm, right_norm = right_norm, left_norm
+        # 栈中为 (规范化形式, 运算符, 可交换运算链的操作数列表)
+        results = []
+        for node in self._iter_postorder(_never_done):
+            if node.is_leaf():
+                results.append((node._value.to_string(), None, None))
+                continue
+            right = results.pop()
+            left = results.pop()
+            operator = node._operator
+            if operator in _COMMUTATIVE_OPERATORS:
+                operands = _chain_operands(left, operator) + _chain_operands(right, operator)
+                operands.sort()
+                results.append((f"({operator.join(operands)})", operator, operands))
+            else:
+                results.append((f"({left[0]}{operator}{right[0]})", operator, None))
+        return results[0][0]
+    
+    def _compute_canonical_keys(self):
+        """自底向上计算尚未缓存的规范键（修改子表达式后使用）"""
+        for node in self._iter_postorder(_has_canonical_key):
+            node._canonical_key = node._build_canonical_key()
+    
+    def _build_canonical_key(self) -> Optional[tuple]:
+        """
+        由子节点的规范键组合出本节点的规范键
         
-        return f"({left_norm}{self.operator}{right_norm})"
+        叶子为 (分子, 分母)，运算节点为 (-运算符编码, 操作数键的元组)。
+        + 和 × 的连续运算展开为一组操作数并按键排序，因此交换律和结合律变换
+        得到的表达式规范键相同，与 normalized_form 的等价关系一致。
+        """
+        if self._left is None:
+            if self._value is None:
+                return None
+            return canonical_leaf_key(self._value)
+        left_key, right_key = self._left._canonical_key, self._right._canonical_key
+        if self._operator is None or left_key is None or right_key is None:
+            return None
+        return combine_canonical_keys(OPERATOR_CODES[self._operator], left_key, right_key)
     
     def get_operator_count(self) -> int:
         """获取运算符数量"""
-        if self.is_leaf():
-            return 0
-        return 1 + self.left.get_operator_count() + self.right.get_operator_count()
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._left is not None:
+                count += 1
+                stack.append(node._left)
+                stack.append(node._right)
+        return count
+
+
+# 运算符优先级
+_PRIORITIES = {'+': 1, '-': 1, '×': 2, '÷': 2}
+_COMMUTATIVE_OPERATORS = ('+', '×')
+
+
+def canonical_leaf_key(value: Fraction) -> tuple:
+    """叶子的规范键"""
+    return (value.numerator, value.denominator)
+
+
+def combine_canonical_keys(code: int, left_key: tuple, right_key: tuple) -> tuple:
+    """
+    由左右操作数的规范键组合出运算节点的规范键
+    
+    可交换运算的操作数若是同一运算，直接并入其已排序的操作数，
+    不需要重新展开子树；叶子键的首元素非负，运算节点键的首元素为负，不会混淆。
+    
+    Args:
+        code: 运算符编码
+        left_key: 左操作数的规范键
+        right_key: 右操作数的规范键
+        
+    Returns:
+        规范键 (-运算符编码, 操作数键的元组)
+    """
+    tag = -code
+    if code not in COMMUTATIVE_CODES:
+        return (tag, (left_key, right_key))
+    left_chain = left_key[0] == tag
+    right_chain = right_key[0] == tag
+    if not (left_chain or right_chain):
+        return (tag, (left_key, right_key) if left_key <= right_key else (right_key, left_key))
+    operands = (left_key[1] if left_chain else (left_key,)) + (right_key[1] if right_chain else (right_key,))
+    return (tag, tuple(sorted(operands)))
+
+
+def _chain_operands(entry: tuple, operator: str) -> List[str]:
+    """normalized_form 中子表达式在 operator 运算链中贡献的操作数"""
+    form, entry_operator, operands = entry
+    if entry_operator == operator:
+        return list(operands)
+    return [form]
+
+
+def _apply_operator(operator: str, left_val: Fraction, right_val: Fraction) -> Fraction:
+    """计算一次运算，结果为负数或除数为零时抛出异常"""
+    if operator == '+':
+        return left_val + right_val
+    if operator == '-':
+        # 确保不产生负数
+        if left_val < right_val:
+            raise NegativeResultError("减法结果不能为负数")
+        return left_val - right_val
+    if operator == '×':
+        return left_val * right_val
+    if operator == '÷':
+        if right_val.numerator == 0:
+            raise DivisionByZeroError("除数不能为零")
+        return left_val / right_val
+    raise ValueError(f"未知运算符: {operator}")
+
+
+# 不超过该深度的表达式直接递归处理（常见的浅层表达式），更深时改用显式栈
+_SHALLOW_DEPTH = 50
+
+
+class _TooDeep(Exception):
+    """表达式超过 _SHALLOW_DEPTH，需要改用显式栈处理"""
+
+
+def _evaluate_shallow(node: Expression, depth: int) -> Fraction:
+    """递归计算浅层表达式的值并缓存"""
+    if depth > _SHALLOW_DEPTH:
+        raise _TooDeep
+    # 叶子和已计算的子表达式直接取值（自底向上构建时的常见情况），不再递归
+    left, right = node._left, node._right
+    if left._left is None:
+        left_val = left._value
+    else:
+        left_val = left._cached_value
+        if left_val is None:
+            left_val = _evaluate_shallow(left, depth + 1)
+    if right._left is None:
+        right_val = right._value
+    else:
+        right_val = right._cached_value
+        if right_val is None:
+            right_val = _evaluate_shallow(right, depth + 1)
+    node._cached_value = _apply_operator(node._operator, left_val, right_val)
+    return node._cached_value
+
+
+def _render_shallow(node: Expression, outer_priority: int, depth: int) -> str:
+    """递归输出浅层表达式，括号规则与 Expression.to_string 相同"""
+    if node._left is None:
+        return node._value.to_string()
+    if depth > _SHALLOW_DEPTH:
+        raise _TooDeep
+    operator = node._operator
+    priority = _PRIORITIES[operator]
+    left, right = node._left, node._right
+    # 叶子直接输出，省去一次函数调用
+    left_text = left._value.to_string() if left._left is None else _render_shallow(left, priority, depth + 1)
+    if right._left is None:
+        right_text = right._value.to_string()
+    else:
+        right_priority = priority if operator in _COMMUTATIVE_OPERATORS and right._operator == operator \
+            else priority + 1
+        right_text = _render_shallow(right, right_priority, depth + 1)
+    if priority < outer_priority:
+        return f"({left_text} {operator} {right_text})"
+    return f"{left_text} {operator} {right_text}"
+
+
+def _normalize_shallow(node: Expression, depth: int) -> tuple:
+    """递归计算浅层表达式的 (规范化形式, 运算符, 可交换运算链的操作数列表)"""
+    if node._left is None:
+        return node._value.to_string(), None, None
+    if depth > _SHALLOW_DEPTH:
+        raise _TooDeep
+    left = _normalize_shallow(node._left, depth + 1)
+    right = _normalize_shallow(node._right, depth + 1)
+    operator = node._operator
+    if operator not in _COMMUTATIVE_OPERATORS:
+        return f"({left[0]}{operator}{right[0]})", operator, None
+    operands = (left[2] if left[1] == operator else [left[0]]) + (right[2] if right[1] == operator else [right[0]])
+    operands.sort()
+    return f"({operator.join(operands)})", operator, operands
+
+
+def _has_value(node: Expression) -> bool:
+    return node._left is None or node._cached_value is not None
+
+
+def _has_canonical_key(node: Expression) -> bool:
+    return node._canonical_key is not None
+
+
+def _never_done(node: Expression) -> bool:
+    return False
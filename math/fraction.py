@@ -1,8 +1,13 @@
 import math
 from typing import Union, Tuple
 
+_gcd = math.gcd
+_new = object.__new__
+
 class Fraction:
-    """分数类，处理真分数和带分数的运算"""
+    """分数类，处理真分数和带分数的运算（不可变，可哈希）"""
+    
+    __slots__ = ('_numerator', '_denominator')
     
     def __init__(self, numerator: int, denominator: int = 1, whole: int = 0):
         if denominator == 0:
@@ -19,19 +24,33 @@ class Fraction:
             numerator = -numerator
             denominator = -denominator
         
-        self.numerator = numerator
-        self.denominator = denominator
-        self._simplify()
-    
-    def _simplify(self):
-        """约分"""
-        if self.numerator == 0:
-            self.denominator = 1
-            return
+        # 约分
+        if numerator == 0:
+            denominator = 1
+        elif denominator != 1:
+            gcd_val = math.gcd(numerator, denominator)
+            if gcd_val != 1:
+                numerator //= gcd_val
+                denominator //= gcd_val
         
-        gcd_val = math.gcd(abs(self.numerator), self.denominator)
-        self.numerator //= gcd_val
-        self.denominator //= gcd_val
+        self._numerator = numerator
+        self._denominator = denominator
+    
+    @classmethod
+    def _from_reduced(cls, numerator: int, denominator: int) -> 'Fraction':
+        """由已约分、分母为正的分子分母直接构造，跳过校验和约分"""
+        obj = _new(cls)
+        obj._numerator = numerator
+        obj._denominator = denominator
+        return obj
+    
+    @property
+    def numerator(self) -> int:
+        return self._numerator
+    
+    @property
+    def denominator(self) -> int:
+        return self._denominator
     
     def to_mixed_number(self) -> Tuple[int, int, int]:
         """转换为带分数形式"""
@@ -46,41 +65,160 @@ class Fraction:
         else:
             return (0, self.numerator, self.denominator)
     
-    def __add__(self, other: 'Fraction') -> 'Fraction':
-        common_denominator = self.denominator * other.denominator
-        numerator = (self.numerator * other.denominator + 
-                    other.numerator * self.denominator)
-        return Fraction(numerator, common_denominator)
-    
-    def __sub__(self, other: 'Fraction') -> 'Fraction':
-        common_denominator = self.denominator * other.denominator
-        numerator = (self.numerator * other.denominator - 
-                    other.numerator * self.denominator)
-        return Fraction(numerator, common_denominator)
-    
-    def __mul__(self, other: 'Fraction') -> 'Fraction':
-        numerator = self.numerator * other.numerator
-        denominator = self.denominator * other.denominator
-        return Fraction(numerator, denominator)
-    
-    def __truediv__(self, other: 'Fraction') -> 'Fraction':
-        if other.numerator == 0:
+    def __add__(self, other: Union['Fraction', int]) -> 'Fraction':
+        if type(other) is Fraction:
+            on = other._numerator
+            od = other._denominator
+        elif isinstance(other, int):
+            on, od = other, 1
+        else:
+            return NotImplemented
+        sd = self._denominator
+        obj = _new(Fraction)
+        if sd == od:
+            n = self._numerator + on
+            if sd != 1:
+                g = _gcd(n, sd)
+                if g != 1:
+                    n //= g
+                    sd //= g
+            obj._numerator = n
+            obj._denominator = sd if n else 1
+            return obj
+        n = self._numerator * od + on * sd
+        d = sd * od
+        g = _gcd(n, d)
+        obj._numerator = n // g
+        obj._denominator = d // g
+        return obj
+    
+    __radd__ = __add__
+    
+    def __sub__(self, other: Union['Fraction', int]) -> 'Fraction':
+        if type(other) is Fraction:
+            on = other._numerator
+            od = other._denominator
+        elif isinstance(other, int):
+            on, od = other, 1
+        else:
+            return NotImplemented
+        sd = self._denominator
+        obj = _new(Fraction)
+        if sd == od:
+            n = self._numerator - on
+            if sd != 1:
+                g = _gcd(n, sd)
+                if g != 1:
+                    n //= g
+                    sd //= g
+            obj._numerator = n
+            obj._denominator = sd if n else 1
+            return obj
+        n = self._numerator * od - on * sd
+        d = sd * od
+        g = _gcd(n, d)
+        obj._numerator = n // g
+        obj._denominator = d // g
+        return obj
+    
+    def __rsub__(self, other: int) -> 'Fraction':
+        if isinstance(other, int):
+            return Fraction._from_reduced(other, 1) - self
+        return NotImplemented
+    
+    def __mul__(self, other: Union['Fraction', int]) -> 'Fraction':
+        if type(other) is Fraction:
+            on = other._numerator
+            od = other._denominator
+        elif isinstance(other, int):
+            on, od = other, 1
+        else:
+            return NotImplemented
+        sn = self._numerator
+        sd = self._denominator
+        obj = _new(Fraction)
+        if sd == 1 and od == 1:
+            obj._numerator = sn * on
+            obj._denominator = 1
+        elif sn == 0 or on == 0:
+            obj._numerator = 0
+            obj._denominator = 1
+        else:
+            # 交叉约分后的乘积已是最简形式
+            g1 = _gcd(sn, od)
+            g2 = _gcd(on, sd)
+            obj._numerator = (sn // g1) * (on // g2)
+            obj._denominator = (sd // g2) * (od // g1)
+        return obj
+    
+    __rmul__ = __mul__
+    
+    def __truediv__(self, other: Union['Fraction', int]) -> 'Fraction':
+        if type(other) is Fraction:
+            on = other._numerator
+            od = other._denominator
+        elif isinstance(other, int):
+            on, od = other, 1
+        else:
+            return NotImplemented
+        if on == 0:
             raise ValueError("除数不能为零")
-        numerator = self.numerator * other.denominator
-        denominator = self.denominator * other.numerator
-        return Fraction(numerator, denominator)
+        # 除以 on/od 即乘以 od/on，保证分母为正
+        if on < 0:
+            on, od = -on, -od
+        sn = self._numerator
+        sd = self._denominator
+        obj = _new(Fraction)
+        if sn == 0:
+            obj._numerator = 0
+            obj._denominator = 1
+        else:
+            g1 = _gcd(sn, on)
+            g2 = _gcd(od, sd)
+            obj._numerator = (sn // g1) * (od // g2)
+            obj._denominator = (sd // g2) * (on // g1)
+        return obj
+    
+    def __rtruediv__(self, other: int) -> 'Fraction':
+        if isinstance(other, int):
+            return Fraction._from_reduced(other, 1) / self
+        return NotImplemented
+    
+    def __eq__(self, other: object) -> bool:
+        if type(other) is Fraction:
+            # 两者均为最简形式，直接比较分子分母
+            return (self._numerator == other._numerator and
+                    self._denominator == other._denominator)
+        if isinstance(other, int):
+            return self._denominator == 1 and self._numerator == other
+        return NotImplemented
+    
+    def __hash__(self) -> int:
+        # 整数值与对应的 int 哈希一致
+        if self._denominator == 1:
+            return hash(self._numerator)
+        return hash((self._numerator, self._denominator))
+    
+    def __lt__(self, other: Union['Fraction', int]) -> bool:
+        if isinstance(other, int):
+            return self._numerator < other * self._denominator
+        return (self._numerator * other._denominator <
+                other._numerator * self._denominator)
+    
+    def __gt__(self, other: Union['Fraction', int]) -> bool:
+        if isinstance(other, int):
+            return self._numerator > other * self._denominator
+        return (self._numerator * other._denominator >
+                other._numerator * self._denominator)
     
-    def __eq__(self, other: 'Fraction') -> bool:
-        return (self.numerator * other.denominator == 
-                other.numerator * self.denominator)
+    def __le__(self, other: Union['Fraction', int]) -> bool:
+        return not self > other
     
-    def __lt__(self, other: 'Fraction') -> bool:
-        return (self.numerator * other.denominator < 
-                other.numerator * self.denominator)
+    def __ge__(self, other: Union['Fraction', int]) -> bool:
+        return not self < other
     
-    def __gt__(self, other: 'Fraction') -> bool:
-        return (self.numerator * other.denominator > 
-                other.numerator * self.denominator)
+    def __reduce__(self):
+        return (Fraction, (self._numerator, self._denominator))
     
     def is_positive(self) -> bool:
         return self.numerator > 0
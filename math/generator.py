@@ -1,22 +1,117 @@
+import hashlib
 import random
-import time
-from typing import List, Set, Tuple, Optional
+import multiprocessing
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Optional
 from fraction import Fraction
-from expression import Expression
+from expression import Expression, NegativeResultError
+import expr_parser
+from enumerator import sample_expressions, space_size_bound
+from progress import GenerationStats, REJECT_DUPLICATE
+from history import ProblemHistory
+from operand_index import ConstraintError, GenerationConstraints, get_operand_index, index_fits, is_identity_operation
+from leaf_pool import get_leaf_pool
+
+# 生成算法的版本，同一随机种子生成的题目发生变化时递增，使按种子缓存的结果失效
+ALGORITHM_VERSION = 6
+
+# 题目空间上界不超过该值时，数量不足的警告中建议使用 --exhaustive（枚举约需数秒）
+EXHAUSTIVE_HINT_LIMIT = 5000000
+
+
+def derive_seed(seed: int, *path: int) -> int:
+    """
+    由主种子和路径（如轮次、任务序号）派生子种子，不同路径得到互不相关的随机数流
+
+    Args:
+        seed: 主种子
+        path: 子流路径
+
+    Returns:
+        64位子种子
+    """
+    data = ':'.join(str(part) for part in (seed,) + path).encode('ascii')
+    return int.from_bytes(hashlib.sha256(data).digest()[:8], 'little')
+
+
+def _generate_candidates(task: Tuple[int, int, int, int, bool, Optional[GenerationConstraints]]) -> Tuple[List[Tuple[tuple, str, int, int]], Dict[str, int]]:
+    """
+    并行生成的工作进程函数，使用独立的随机种子生成候选题目
+
+    Args:
+        task: (数值范围, 尝试次数, 最大运算符数量, 随机种子, 是否构造式生成, 定向生成约束)
+
+    Returns:
+        (规范键, 题目字符串, 答案分子, 答案分母) 的列表（进程内已去重）和按原因统计的丢弃数量
+    """
+    number_range, attempts, max_operators, seed, constructive, constraints = task
+    generator = ProblemGenerator(number_range, constructive, seed=seed, constraints=constraints)
+    randint = generator.rng.randint
+    candidates = []
+
+    for _ in range(attempts):
+        try:
+            expr = generator._next_expression(randint(1, max_operators))
+            if generator._is_duplicate(expr):
+                generator.stats.reject(REJECT_DUPLICATE)
+                continue
+            answer = expr.evaluate()
+            # 规范键是扁平的整数元组，答案以整数对传回，减少进程间序列化的开销
+            candidates.append((expr.canonical_key, f"{expr.to_string()} =",
+                               answer.numerator, answer.denominator))
+        except (ValueError, ZeroDivisionError) as e:
+            generator.stats.reject_error(e)
+
+    return candidates, generator.stats.rejections
+
 
 class ProblemGenerator:
     """题目生成器，负责生成不重复的四则运算题目"""
     
-    def __init__(self, number_range: int):
+    def __init__(self, number_range: int, constructive: bool = False,
+                 progress_callback: Optional[Callable[[GenerationStats], None]] = None,
+                 history: Optional[ProblemHistory] = None, seed: Optional[int] = None,
+                 constraints: Optional[GenerationConstraints] = None):
         """
         初始化生成器
         
         Args:
             number_range: 数值范围（不包括该值）
+            constructive: 是否使用构造式生成，每次尝试都直接得到合法表达式
+            progress_callback: 进度回调，每接受一道题目和生成结束时以统计信息调用，
+                默认不输出任何进度
+            history: 跨运行的题目历史，历史中已有的题目视为重复；
+                本次生成的题目在 commit_history 时写入
+            seed: 随机种子，相同的种子和参数（并行模式下还需相同的进程数）
+                生成相同的题目；默认不固定
+            constraints: 定向生成约束（答案范围、最大分母、运算符），
+                指定时按预先建立的操作数索引直接生成满足约束的题目；
+                索引过大时改为构造式生成后筛选
         """
         self.number_range = number_range
-        self.generated_expressions: Set[str] = set()
+        self.constructive = constructive
+        self.progress_callback = progress_callback
+        self.seed = seed
+        self.rng = random.Random(seed)  # 生成器专用的随机数流，不影响全局 random
+        self.constraints = constraints
+        self._leaf_pool = get_leaf_pool(number_range)  # 叶子值表（数值范围过大时为逐个生成的生成器）
+        self._leaf_buffers = {False: [], True: []}  # 按是否排除零分别缓存的一批叶子值
+        self.leaf_batch_size = 1024  # 每次从叶子表中抽取的数量
+        self._operand_index = None
+        if constraints is not None and index_fits(number_range, constraints):
+            self._operand_index = get_operand_index(number_range, constraints)
+            if not self._operand_index.targets:
+                raise ValueError("没有满足约束条件的题目")
+        self._operators = list(constraints.operators) if constraints else ['+', '-', '×', '÷']
+        self.stats = GenerationStats()  # 最近一次生成的统计信息
+        self.generated_expressions: Set[tuple] = set()  # 已生成表达式的规范键
+        self._existing_keys: Set[tuple] = set()  # 续写时已有题目的规范键，清空缓存时保留
+        self.history = history
+        self._pending_history: List[tuple] = []  # 尚未写入历史的规范键
         self.max_retry_count = 1000  # 最大重试次数，避免无限循环
+        self.constructive_attempts_per_problem = 10  # 构造式生成时每道题的尝试预算
+        self.sampled_attempts_per_problem = 100  # 约束索引过大、筛选生成时每道题的尝试预算
+        self.parallel_chunk_size = 2000  # 并行模式下每个任务的尝试次数
+        self.max_parallel_rounds = 10  # 并行模式下的最大补充轮数
     
     def generate_problems(self, count: int, max_operators: int = 3) -> List[Tuple[str, Fraction]]:
         """
@@ -29,45 +124,339 @@ class ProblemGenerator:
         Returns:
             题目和答案的列表
         """
-        problems = []
-        retry_count = 0
-        start_time = time.time()
+        return list(self.iter_problems(count, max_operators))
+    
+    def iter_problems(self, count: int, max_operators: int = 3) -> Iterator[Tuple[str, Fraction]]:
+        """
+        逐个生成题目，每生成一道立即产出，不在内存中保留题目列表
         
-        print(f"开始生成 {count} 道题目，数值范围: 0-{self.number_range-1}...")
+        Args:
+            count: 题目数量
+            max_operators: 最大运算符数量
+            
+        Returns:
+            题目和答案的迭代器
+        """
+        for expr, answer in self.iter_expressions(count, max_operators):
+            yield f"{expr.to_string()} =", answer
+    
+    def iter_expressions(self, count: int, max_operators: int = 3) -> Iterator[Tuple[Expression, Fraction]]:
+        """
+        逐个生成题目的表达式，与 iter_problems 相同但不渲染为文本
+        
+        Args:
+            count: 题目数量
+            max_operators: 最大运算符数量
+            
+        Returns:
+            表达式和答案的迭代器
+        """
+        stats = self.stats
+        stats.start(count)
+        retry_count = 0
+        max_retry_count = self._attempt_budget(count)
         
-        while len(problems) < count and retry_count < self.max_retry_count:
+        while stats.accepted < count and retry_count < max_retry_count:
+            stats.attempts += 1
             try:
                 # 随机选择运算符数量（1-3个）
-                op_count = random.randint(1, max_operators)
-                expr = self.generate_single_expression(op_count)
+                op_count = self.rng.randint(1, max_operators)
+                expr = self._next_expression(op_count)
                 
                 # 检查是否重复
-                if not self._is_duplicate(expr):
+                if self._is_duplicate(expr):
+                    stats.reject(REJECT_DUPLICATE)
+                else:
                     # 计算答案
                     answer = expr.evaluate()
-                    # 格式化为题目字符串
-                    problem_str = f"{expr.to_string()} ="
-                    problems.append((problem_str, answer))
-                    print(f"已生成 {len(problems)}/{count} 道题目")
+                    stats.accepted += 1
+                    self._report_progress()
+                    yield expr, answer
                 
             except (ValueError, ZeroDivisionError) as e:
                 # 表达式不合法，继续生成
-                pass
+                stats.reject_error(e)
             finally:
                 retry_count += 1
         
+        self._finish(count)
+    
+    def generate_problems_parallel(self, count: int, workers: int,
+                                   max_operators: int = 3) -> List[Tuple[str, Fraction]]:
+        """
+        使用多进程并行生成指定数量的题目
+
+        每个任务使用由本生成器的随机数流派生的独立种子生成候选题目，主进程按任务
+        顺序、按规范键统一去重合并，保证结果中没有重复题目；固定种子时结果可复现。
+
+        Args:
+            count: 题目数量
+            workers: 工作进程数
+            max_operators: 最大运算符数量
+
+        Returns:
+            题目和答案的列表
+        """
+        problems = []
+        stats = self.stats
+        stats.start(count)
+
+        acceptance_rate = 1.0
+        budget = self._attempt_budget(count)
+        base_seed = self.rng.getrandbits(64)
+        with multiprocessing.Pool(workers) as pool:
+            for round_index in range(self.max_parallel_rounds):
+                remaining = count - len(problems)
+                if remaining <= 0 or stats.attempts >= budget:
+                    break
+
+                # 按上一轮的接受率多生成一些候选，抵消重复带来的损耗；
+                # 总尝试次数与串行生成共用同一预算，进程数只影响速度
+                attempts = min(int(remaining / acceptance_rate * 1.1) + workers, budget - stats.attempts)
+                total_attempts = attempts
+                chunk_size = min(self.parallel_chunk_size, -(-attempts // workers))
+                tasks = []
+                while attempts > 0:
+                    size = min(chunk_size, attempts)
+                    tasks.append((self.number_range, size, max_operators,
+                                  derive_seed(base_seed, round_index, len(tasks)), self.constructive,
+                                  self.constraints))
+                    attempts -= size
+
+                added = 0
+                for (candidates, rejections), task in zip(pool.imap(_generate_candidates, tasks), tasks):
+                    stats.merge(task[1], rejections)
+                    for key, problem_str, numerator, denominator in candidates:
+                        if len(problems) >= count:
+                            break
+                        if self._is_duplicate_key(key):
+                            stats.reject(REJECT_DUPLICATE)
+                            continue
+                        problems.append((problem_str, Fraction._from_reduced(numerator, denominator)))
+                        added += 1
+                    stats.accepted = len(problems)
+                    self._report_progress()
+
+                acceptance_rate = max(added / total_attempts, 0.01)
+
+        self._finish(count)
+
+        return problems
+
+    def generate_exhaustive(self, count: int, max_operators: int = 3) -> List[Tuple[str, Fraction]]:
+        """
+        枚举整个题目空间，从中均匀抽取题目，适用于较小的数值范围
+        
+        Args:
+            count: 题目数量，超过题目空间大小时返回全部题目
+            max_operators: 最大运算符数量
+            
+        Returns:
+            按枚举顺序排列的题目和答案列表
+        """
+        problems = []
+        stats = self.stats
+        stats.start(count)
+        
+        expressions, space_size = sample_expressions(self.number_range, count, max_operators, self.rng)
+        for expr in expressions:
+            stats.attempts += 1
+            if self._is_duplicate(expr):
+                stats.reject(REJECT_DUPLICATE)
+                continue
+            problems.append((f"{expr.to_string()} =", expr.evaluate()))
+            stats.accepted += 1
+            self._report_progress()
+        
         if len(problems) < count:
-            print(f"警告: 只生成了 {len(problems)} 道题目，未能达到要求的 {count} 道")
-            print("可能是数值范围太小或去重条件太严格")
+            print(f"题目空间中共有 {space_size} 道题目，去重和历史过滤后导出 {len(problems)} 道")
         
-        end_time = time.time()
-        print(f"题目生成完成，耗时: {end_time - start_time:.2f} 秒")
+        stats.finish()
+        self._report_progress()
         
         return problems
     
+    def _attempt_budget(self, count: int) -> int:
+        """串行和并行生成共用的总尝试次数上限"""
+        if self._sampling_constraints:
+            # 筛选生成会丢弃不满足约束的候选，预算随题目数量增长
+            return max(self.max_retry_count, count * self.sampled_attempts_per_problem)
+        if self.constructive:
+            # 构造式生成不会产生非法表达式，尝试次数只消耗在重复题目上，随题目数量增长
+            return max(self.max_retry_count, count * self.constructive_attempts_per_problem)
+        return self.max_retry_count
+    
+    def _report_progress(self):
+        """调用进度回调"""
+        if self.progress_callback is not None:
+            self.progress_callback(self.stats)
+    
+    def _finish(self, count: int):
+        """结束本轮生成，数量不足时给出警告"""
+        self.stats.finish()
+        self._report_progress()
+        if self.stats.accepted < count:
+            print(f"警告: 只生成了 {self.stats.accepted} 道题目，未能达到要求的 {count} 道")
+            if self._sampling_constraints:
+                print("数值范围过大，未建立定向生成索引，可能是约束条件太严格，可用 --max-denominator 缩小范围")
+            elif self.constraints is None and space_size_bound(self.number_range) <= EXHAUSTIVE_HINT_LIMIT:
+                print("可能是数值范围太小或去重条件太严格，可使用 --exhaustive 枚举全部题目")
+            elif not self.constructive:
+                print(f"默认模式最多尝试 {self.max_retry_count} 次，可使用 --constructive 生成更多题目")
+            else:
+                print("可能是数值范围太小或去重条件太严格")
+    
+    def _next_expression(self, operator_count: int) -> Expression:
+        """按当前生成模式生成一个表达式"""
+        if self._operand_index is not None:
+            return self.generate_targeted_expression(operator_count)
+        if self._sampling_constraints:
+            return self.generate_sampled_constrained_expression(operator_count)
+        if self.constructive:
+            return self.generate_constructive_expression(operator_count)
+        return self.generate_single_expression(operator_count)
+    
+    def generate_constructive_expression(self, operator_count: int, nonzero: bool = False) -> Expression:
+        """
+        构造式生成单个表达式，按运算符约束操作数，不会产生需要丢弃的表达式
+        
+        减法保证被减数不小于减数，除法保证除数不为零，所有中间结果都非负。
+        
+        Args:
+            operator_count: 运算符数量
+            nonzero: 是否要求表达式的值不为零（用于生成除数）
+            
+        Returns:
+            表达式对象
+        """
+        if operator_count == 0:
+            return Expression(value=self._generate_random_number(nonzero))
+        
+        operator = self.rng.choice(self._operators)
+        left_op_count = self.rng.randint(0, operator_count - 1)
+        right_op_count = operator_count - 1 - left_op_count
+        
+        if operator == '+':
+            # 左操作数非零即可保证和非零
+            left_expr = self.generate_constructive_expression(left_op_count, nonzero)
+            right_expr = self.generate_constructive_expression(right_op_count)
+        elif operator == '-':
+            left_expr = self.generate_constructive_expression(left_op_count, nonzero)
+            right_expr = self.generate_constructive_expression(right_op_count)
+            left_val = left_expr.evaluate()
+            right_val = right_expr.evaluate()
+            if left_val < right_val:
+                left_expr, right_expr = right_expr, left_expr
+            elif nonzero and left_val == right_val:
+                # 差为零时改用加法，两个操作数都非零
+                operator = '+'
+        elif operator == '×':
+            left_expr = self.generate_constructive_expression(left_op_count, nonzero)
+            right_expr = self.generate_constructive_expression(right_op_count, nonzero)
+        else:
+            left_expr = self.generate_constructive_expression(left_op_count, nonzero)
+            right_expr = self.generate_constructive_expression(right_op_count, True)
+        
+        return Expression(left=left_expr, right=right_expr, operator=operator)
+    
+    @property
+    def _sampling_constraints(self) -> bool:
+        """是否因索引过大而改用筛选方式满足约束"""
+        return self.constraints is not None and self._operand_index is None
+    
+    def generate_sampled_constrained_expression(self, operator_count: int) -> Expression:
+        """
+        构造式生成一个只含允许运算符的表达式，再检查约束条件
+        
+        用于数值范围过大、无法建立操作数索引的情况。
+        
+        Args:
+            operator_count: 运算符数量
+            
+        Returns:
+            满足约束条件的表达式
+            
+        Raises:
+            ConstraintError: 候选不满足约束条件或含有平凡运算
+        """
+        expr = self.generate_constructive_expression(operator_count)
+        constraints = self.constraints
+        max_denominator = constraints.max_denominator
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            value = node.evaluate()
+            if max_denominator is not None and value.denominator > max_denominator:
+                raise ConstraintError("操作数或中间结果的分母超过限制")
+            if node.is_leaf():
+                continue
+            if node.operator not in constraints.operators:
+                raise ConstraintError(f"不允许的运算符: {node.operator}")
+            if is_identity_operation(node.left.evaluate(), node.operator, node.right.evaluate()):
+                raise ConstraintError("含有平凡运算")
+            stack.append(node.left)
+            stack.append(node.right)
+        if not constraints.accepts_answer(expr.evaluate()):
+            raise ConstraintError("答案不满足约束条件")
+        return expr
+    
+    def generate_targeted_expression(self, operator_count: int) -> Expression:
+        """
+        按约束条件定向生成单个表达式
+        
+        先抽取满足答案约束的值并选出结果为该值的操作数对，再反复把某个叶子
+        替换为结果等于该叶子值的操作数对，直到运算符数量足够，表达式的值不变。
+        
+        Args:
+            operator_count: 运算符数量，叶子都无法展开时可能少于该值
+            
+        Returns:
+            表达式对象
+        """
+        index = self._operand_index
+        rng = self.rng
+        # 节点表示为列表：叶子为 [值]，运算节点为 [运算符, 左, 右]，展开叶子时原地修改
+        root = [index.sample_target(rng)]
+        leaves = [root]
+        for _ in range(operator_count):
+            while leaves:
+                position = rng.randrange(len(leaves))
+                leaf = leaves[position]
+                pair = index.sample_pair(leaf[0], rng)
+                if pair is not None:
+                    break
+                # 该叶子无法展开，不再考虑
+                leaves[position] = leaves[-1]
+                leaves.pop()
+            else:
+                break
+            left, operator, right = [pair[0]], pair[1], [pair[2]]
+            leaf[:] = [operator, left, right]
+            leaves[position] = left
+            leaves.append(right)
+        
+        # 自底向上转换为表达式对象
+        stack = [(root, False)]
+        built = []
+        while stack:
+            node, visited = stack.pop()
+            if len(node) == 1:
+                built.append(Expression(value=node[0]))
+            elif visited:
+                right_expr = built.pop()
+                left_expr = built.pop()
+                built.append(Expression(left=left_expr, right=right_expr, operator=node[0]))
+            else:
+                stack.append((node, True))
+                stack.append((node[2], False))
+                stack.append((node[1], False))
+        return built[0]
+    
     def generate_single_expression(self, operator_count: int) -> Expression:
         """
-        生成单个表达式
+        生成单个表达式，不合法时在循环中重新生成，递归深度只与运算符数量有关
+        
+        只有被整体丢弃的候选表达式计入拒绝统计，子表达式的内部重试不计入。
         
         Args:
             operator_count: 运算符数量
@@ -75,72 +464,72 @@ class ProblemGenerator:
         Returns:
             表达式对象
         """
+        return self._valid_expression(operator_count, count_rejections=True)
+    
+    def _valid_expression(self, operator_count: int, count_rejections: bool = False) -> Expression:
+        """生成合法的表达式，count_rejections 为真时记录被丢弃的候选"""
         if operator_count == 0:
             # 生成叶子节点（数值）
             value = self._generate_random_number()
             return Expression(value=value)
         
+        while True:
+            expr = self._random_expression_attempt(operator_count)
+            
+            # 最终验证表达式合法性
+            try:
+                result = expr.evaluate()
+                # 确保结果为正数（根据需求）
+                if not result.is_positive() and result.numerator != 0:
+                    raise NegativeResultError("结果必须为正数")
+                return expr
+            except (ValueError, ZeroDivisionError) as e:
+                # 如果表达式不合法，重新生成
+                if count_rejections:
+                    self.stats.reject_error(e)
+    
+    def _random_expression_attempt(self, operator_count: int) -> Expression:
+        """随机生成一个运算符数量为 operator_count 的候选表达式，子表达式都是合法的"""
         # 随机选择运算符
-        operator = random.choice(['+', '-', '×', '÷'])
+        operator = self.rng.choice(['+', '-', '×', '÷'])
         
         # 分配左右子树的运算符数量
-        left_op_count = random.randint(0, operator_count - 1)
+        left_op_count = self.rng.randint(0, operator_count - 1)
         right_op_count = operator_count - 1 - left_op_count
         
-        left_expr = self.generate_single_expression(left_op_count)
-        right_expr = self.generate_single_expression(right_op_count)
+        left_expr = self._valid_expression(left_op_count)
+        right_expr = self._valid_expression(right_op_count)
         
         # 对于减法和除法，进行特殊处理确保合法性
         if operator == '-':
             # 确保左表达式 ≥ 右表达式，避免负数
-            left_val = left_expr.evaluate()
-            right_val = right_expr.evaluate()
-            if left_val < right_val:
+            if left_expr.evaluate() < right_expr.evaluate():
                 # 交换左右表达式
                 left_expr, right_expr = right_expr, left_expr
         elif operator == '÷':
-            # 确保除数不为零，且结果为真分数（如果被除数小于除数）
-            left_val = left_expr.evaluate()
-            right_val = right_expr.evaluate()
-            if right_val.numerator == 0:
-                # 除数为零，重新生成右表达式
-                right_expr = self.generate_single_expression(right_op_count)
-                right_val = right_expr.evaluate()
-            
-            # 如果被除数小于除数，确保结果是真分数
-            if left_val < right_val:
-                # 这种情况下结果是真分数，符合要求
-                pass
+            # 确保除数不为零
+            if right_expr.evaluate().numerator == 0:
+                # 除数为零，重新生成右表达式（候选尚未成形，不计入拒绝统计）
+                right_expr = self._valid_expression(right_op_count)
         
-        expr = Expression(left=left_expr, right=right_expr, operator=operator)
-        
-        # 最终验证表达式合法性
-        try:
-            result = expr.evaluate()
-            # 确保结果为正数（根据需求）
-            if not result.is_positive() and result.numerator != 0:
-                raise ValueError("结果必须为正数")
-            return expr
-        except (ValueError, ZeroDivisionError):
-            # 如果表达式不合法，重新生成
-            return self.generate_single_expression(operator_count)
+        return Expression(left=left_expr, right=right_expr, operator=operator)
     
-    def _generate_random_number(self) -> Fraction:
+    def _generate_random_number(self, nonzero: bool = False) -> Fraction:
         """
-        生成随机数，包括整数和真分数
+        生成随机数，包括整数和真分数（60%整数，40%真分数）
         
+        从叶子值生成器中按批抽取；数值范围较小时来自预计算的叶子表，返回的分数对象共享。
+        
+        Args:
+            nonzero: 是否排除零
+            
         Returns:
             分数对象
         """
-        # 60%概率生成整数，40%概率生成真分数
-        if random.random() < 0.6:
-            # 生成整数
-            return Fraction(random.randint(0, self.number_range - 1), 1)
-        else:
-            # 生成真分数
-            denominator = random.randint(2, self.number_range)
-            numerator = random.randint(1, denominator - 1)
-            return Fraction(numerator, denominator)
+        buffer = self._leaf_buffers[nonzero]
+        if not buffer:
+            buffer.extend(self._leaf_pool.sample(self.rng, self.leaf_batch_size, nonzero))
+        return buffer.pop()
     
     def _is_duplicate(self, expr: Expression) -> bool:
         """
@@ -152,32 +541,72 @@ class ProblemGenerator:
         Returns:
             是否重复
         """
-        normalized = expr.normalized_form()
-        
-        if normalized in self.generated_expressions:
+        return self._is_duplicate_key(expr.canonical_key)
+    
+    def _is_duplicate_key(self, key: tuple) -> bool:
+        """按规范键检查是否重复，本次运行中的新键加入去重集合"""
+        if key in self.generated_expressions:
             return True
         
-        self.generated_expressions.add(normalized)
+        self.generated_expressions.add(key)
+        if self.history is None:
+            return False
+        if key in self.history:
+            return True
+        self._pending_history.append(key)
         return False
     
+    def load_existing(self, problems: Iterable[str]) -> int:
+        """
+        将已有题目加入去重集合，用于在已有题目文件后续写
+        
+        Args:
+            problems: 题目字符串
+            
+        Returns:
+            加入的题目数量
+        """
+        count = 0
+        for problem in problems:
+            expr = expr_parser.parse(problem)
+            self._is_duplicate(expr)
+            self._existing_keys.add(expr.canonical_key)
+            count += 1
+        return count
+    
     def clear_cache(self):
-        """清空已生成表达式的缓存"""
-        self.generated_expressions.clear()
+        """清空已生成表达式的缓存（不影响已写入的历史，保留 load_existing 加入的已有题目）"""
+        self.generated_expressions = set(self._existing_keys)
+        self._pending_history.clear()
+    
+    def commit_history(self) -> int:
+        """
+        将本次生成的题目写入历史，应在题目保存之后调用
+        
+        Returns:
+            写入的题目数量
+        """
+        if self.history is None:
+            return 0
+        count = self.history.update(self._pending_history)
+        self._pending_history.clear()
+        return count
 
-    def generate_with_retry(self, count: int, max_retry: int = 3) -> List[Tuple[str, Fraction]]:
+    def generate_with_retry(self, count: int, max_retry: int = 3, workers: int = 1) -> List[Tuple[str, Fraction]]:
         """
         带重试的题目生成
         
         Args:
             count: 题目数量
             max_retry: 最大重试次数
+            workers: 工作进程数，大于1时使用多进程并行生成
             
         Returns:
             题目列表
         """
         for attempt in range(max_retry):
             try:
-                problems = self.generate_problems(count)
+                problems = self._generate(count, workers)
                 if len(problems) >= count * 0.9:  # 达到90%即认为成功
                     return problems
             except Exception as e:
@@ -187,4 +616,10 @@ class ProblemGenerator:
             print(f"开始第 {attempt + 2} 次重试...")
         
         # 最后一次尝试
+        return self._generate(count, workers)
+
+    def _generate(self, count: int, workers: int) -> List[Tuple[str, Fraction]]:
+        """根据进程数选择串行或并行生成"""
+        if workers > 1:
+            return self.generate_problems_parallel(count, workers)
         return self.generate_problems(count)
@@ -0,0 +1,144 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import Iterable
+
+_MAGIC = b'PBF1'
+_HEADER = struct.Struct('<4sHHQQQ')  # 魔数, 键版本, 哈希函数个数, 位数, 设计容量, 已记录数量
+
+# 规范键的格式版本，规范键的定义改变时递增，旧的历史文件随之失效
+KEY_VERSION = 4
+
+
+class ProblemHistory:
+    """
+    跨运行的题目去重索引
+
+    以布隆过滤器记录历史题目的规范键，位数组保存在磁盘文件中并通过内存映射访问，
+    只按需读取访问到的页面，数千万道历史题目也不需要全部载入内存。
+    布隆过滤器不会漏判，但有一定的误判率：极少数新题目会被当作重复而跳过。
+    """
+
+    def __init__(self, path: str, capacity: int = 10000000, fp_rate: float = 0.001):
+        """
+        打开或创建历史文件
+
+        Args:
+            path: 历史文件路径
+            capacity: 设计容量（题目数量），只在创建文件时使用
+            fp_rate: 达到设计容量时的误判率，只在创建文件时使用
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, capacity, fp_rate)
+
+        self.path = path
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, key_version, self.hash_count, self.bit_count, self.capacity, self._count = \
+            _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            self._map.close()
+            self._file.close()
+            raise ValueError(f"不是题目历史文件: {path}")
+        if key_version != KEY_VERSION:
+            self._map.close()
+            self._file.close()
+            raise ValueError(f"题目历史文件的规范键版本为 {key_version}，当前版本为 {KEY_VERSION}，请使用新的历史文件")
+
+    @staticmethod
+    def _create(path: str, capacity: int, fp_rate: float):
+        """按容量和误判率计算位数和哈希函数个数，创建空的历史文件"""
+        if capacity <= 0:
+            raise ValueError("历史容量必须大于0")
+        if not 0 < fp_rate < 1:
+            raise ValueError("误判率必须在0和1之间")
+        bit_count = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        bit_count = -(-bit_count // 8) * 8
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, KEY_VERSION, hash_count, bit_count, capacity, 0))
+            # 扩展为稀疏文件，未写入的页面不占用磁盘
+            f.truncate(_HEADER.size + bit_count // 8)
+
+    def _positions(self, key: tuple):
+        """双重哈希得到键对应的各个位"""
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bit_count = self.bit_count
+        return [(h1 + i * h2) % bit_count for i in range(self.hash_count)]
+
+    def __contains__(self, key: tuple) -> bool:
+        data = self._map
+        offset = _HEADER.size
+        for position in self._positions(key):
+            if not data[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, key: tuple) -> bool:
+        """
+        记录一个规范键
+
+        Args:
+            key: 表达式的规范键
+
+        Returns:
+            是否为新键（已全部置位时视为已存在）
+        """
+        data = self._map
+        offset = _HEADER.size
+        added = False
+        for position in self._positions(key):
+            index = offset + (position >> 3)
+            mask = 1 << (position & 7)
+            byte = data[index]
+            if not byte & mask:
+                data[index] = byte | mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def update(self, keys: Iterable[tuple]) -> int:
+        """
+        批量记录规范键并写回磁盘
+
+        Args:
+            keys: 规范键
+
+        Returns:
+            新记录的键数量
+        """
+        added = sum(1 for key in keys if self.add(key))
+        self.flush()
+        return added
+
+    def __len__(self) -> int:
+        """已记录的题目数量（近似值）"""
+        return self._count
+
+    def estimated_fp_rate(self) -> float:
+        """按当前记录数量估算的误判率"""
+        return (1 - math.exp(-self.hash_count * self._count / self.bit_count)) ** self.hash_count
+
+    def flush(self):
+        """将记录数量和位数组写回磁盘"""
+        _HEADER.pack_into(self._map, 0, _MAGIC, KEY_VERSION, self.hash_count,
+                          self.bit_count, self.capacity, self._count)
+        self._map.flush()
+
+    def close(self):
+        """关闭历史文件"""
+        if not self._map.closed:
+            self.flush()
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ProblemHistory':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
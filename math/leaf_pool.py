@@ -0,0 +1,124 @@
+import random
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Union
+from fraction import Fraction
+from enumerator import leaf_values
+
+# 随机数中整数所占的概率，其余为真分数
+INTEGER_PROBABILITY = 0.6
+
+# 预计算叶子表允许的最大叶子数（按整数个数加全部真分数个数估算），
+# 超过时改为逐个随机生成，避免数值范围较大时建表耗费大量时间和内存
+MAX_POOL_SIZE = 100000
+
+
+class LeafPool:
+    """
+    数值范围内全部叶子值的预计算表
+
+    每个可能的叶子值只创建一次（已约分），抽样时按权重批量抽取表中的对象，
+    不再每次调用 randint 和构造分数。权重与逐个生成时的分布一致：
+    60% 为整数（在范围内均匀），40% 为真分数（分母在 2..number_range 中均匀，
+    再在 1..分母-1 中均匀选取分子后约分）。
+    """
+
+    def __init__(self, number_range: int):
+        """
+        构建叶子表
+
+        Args:
+            number_range: 数值范围
+        """
+        self.number_range = number_range
+        self.values: List[Fraction] = leaf_values(number_range)
+
+        fraction_weights = dict.fromkeys(self.values[number_range:], 0.0)
+        denominator_count = number_range - 1
+        for denominator in range(2, number_range + 1):
+            for numerator in range(1, denominator):
+                value = Fraction(numerator, denominator)
+                fraction_weights[value] += (1 - INTEGER_PROBABILITY) / denominator_count / (denominator - 1)
+        weights = list(fraction_weights.values())
+
+        self.cum_weights = list(accumulate([INTEGER_PROBABILITY / number_range] * number_range + weights))
+        # 排除零的叶子表，用于生成除数等必须非零的操作数
+        self.nonzero_values = self.values[1:]
+        self.nonzero_cum_weights = list(accumulate(
+            [INTEGER_PROBABILITY / (number_range - 1)] * (number_range - 1) + weights))
+
+    def sample(self, rng: random.Random, k: int = 1, nonzero: bool = False) -> List[Fraction]:
+        """
+        按权重批量抽取叶子值
+
+        Args:
+            rng: 随机数生成器
+            k: 抽取数量
+            nonzero: 是否排除零
+
+        Returns:
+            叶子值列表
+        """
+        if nonzero:
+            return rng.choices(self.nonzero_values, cum_weights=self.nonzero_cum_weights, k=k)
+        return rng.choices(self.values, cum_weights=self.cum_weights, k=k)
+
+
+class RandomLeafSampler:
+    """
+    不预计算叶子表的叶子值生成器，用于数值范围过大、无法建表的情况
+
+    与 LeafPool 的接口和分布相同，每次先按概率选择整数或真分数，
+    真分数先在 2..number_range 中均匀选取分母，再在 1..分母-1 中均匀选取分子。
+    """
+
+    def __init__(self, number_range: int):
+        """
+        初始化生成器
+
+        Args:
+            number_range: 数值范围
+        """
+        self.number_range = number_range
+
+    def sample(self, rng: random.Random, k: int = 1, nonzero: bool = False) -> List[Fraction]:
+        """
+        按分布批量生成叶子值
+
+        Args:
+            rng: 随机数生成器
+            k: 生成数量
+            nonzero: 是否排除零
+
+        Returns:
+            叶子值列表
+        """
+        number_range = self.number_range
+        low = 1 if nonzero else 0
+        values = []
+        for _ in range(k):
+            if rng.random() < INTEGER_PROBABILITY:
+                values.append(Fraction(rng.randint(low, number_range - 1), 1))
+            else:
+                denominator = rng.randint(2, number_range)
+                values.append(Fraction(rng.randint(1, denominator - 1), denominator))
+        return values
+
+
+def pool_size_bound(number_range: int) -> int:
+    """数值范围内叶子数的上界：number_range 个整数加上未约分的全部真分数"""
+    return number_range + number_range * (number_range - 1) // 2
+
+
+@lru_cache(maxsize=8)
+def get_leaf_pool(number_range: int) -> Union[LeafPool, RandomLeafSampler]:
+    """
+    获取指定数值范围的叶子值生成器，每个进程内只构建一次
+
+    叶子数不超过 MAX_POOL_SIZE 时返回预计算的 LeafPool，否则返回逐个生成的 RandomLeafSampler
+    """
+    if number_range <= 1:
+        raise ValueError("数值范围必须大于1")
+    if pool_size_bound(number_range) > MAX_POOL_SIZE:
+        return RandomLeafSampler(number_range)
+    return LeafPool(number_range)
@@ -5,12 +5,21 @@
 """
 
 import argparse
+import glob
+import random
 import sys
 import os
-from typing import List, Tuple
 from fraction import Fraction
-from generator import ProblemGenerator
+from generator import ProblemGenerator, ALGORITHM_VERSION
 from checker import AnswerChecker
+from answer_cache import AnswerKeyCache
+from writer import ProblemWriter
+from progress import ProgressReporter
+from history import ProblemHistory
+from worksheet_cache import WorksheetCache
+from problem_set import ProblemSet, write_problem_set
+from operand_index import GenerationConstraints
+import expr_parser
 
 class MathExerciseApp:
     """主应用程序类"""
@@ -25,10 +34,23 @@ class MathExerciseApp:
         args = parser.parse_args()
         
         try:
-            if args.n and args.r:
-                self.generate_exercises(args.n, args.r)
+            if args.serve:
+                import server
+                server.serve(args.serve, max(args.j, 1) if args.j is not None else 4)
+            elif args.n and args.r:
+                self.generate_exercises(args.n, args.r, args.j or 1, args.constructive,
+                                        args.exhaustive, args.resume, args.progress,
+                                        args.history, args.history_fp, args.seed, args.cache_dir,
+                                        args.binary, self._parse_constraints(args))
+            elif args.render:
+                self.render_problem_set(args.render)
             elif args.e and args.a:
-                self.check_answers(args.e, args.a)
+                if args.answer_cache:
+                    self.checker.answer_cache = AnswerKeyCache(args.answer_cache)
+                if self._is_batch_answer_path(args.a):
+                    self.check_submissions(args.e, args.a, args.output_dir, args.stream, args.vectorized, args.j or 1)
+                else:
+                    self.check_answers(args.e, args.a, args.stream, args.vectorized, args.j or 1)
             else:
                 parser.print_help()
         except Exception as e:
@@ -43,90 +65,306 @@ class MathExerciseApp:
             epilog='''
 示例:
   %(prog)s -n 10 -r 10         生成10道10以内的题目
+  %(prog)s -n 100000 -r 10 -j 4 --constructive  使用4个进程并行生成题目
+  %(prog)s -n 1000 -r 3 --exhaustive  从3以内的全部题目中均匀抽取
+  %(prog)s -n 50 -r 10 --history history.bin  不与以往生成过的题目重复
+  %(prog)s -n 50 -r 10 --seed 42  使用固定种子，可随时重新生成同一套题目
+  %(prog)s -n 50 -r 10 --seed 42 --cache-dir cache  相同参数和种子直接使用缓存的题目
+  %(prog)s -n 20 -r 10 --max-answer 10 --operators "+-"  只用加减法、答案不超过10
+  %(prog)s -n 20 -r 10 --max-denominator 4  分母都不超过4
+  %(prog)s -n 1000000 -r 10 --constructive --binary problems.bin  生成二进制题目集
+  %(prog)s --render problems.bin  将二进制题目集渲染为题目和答案文件
   %(prog)s -e exercises.txt -a answers.txt  批改答案
+  %(prog)s -e exercises.txt -a answers.txt --stream  流式批改大文件
+  %(prog)s -e exercises.txt -a answers.txt -j 4  使用4个进程并行批改
+  %(prog)s -e exercises.txt -a submissions/  批改目录中的全部答案文件
+  %(prog)s -e exercises.txt -a "submissions/*.txt" --output-dir grades
+  %(prog)s --serve 127.0.0.1:8000 -j 4  以服务方式运行，提供生成和批改接口
             '''
         )
         
         # 题目生成参数
         parser.add_argument('-n', type=int, help='生成题目的数量')
         parser.add_argument('-r', type=int, help='数值范围（不包括该值）')
+        parser.add_argument('-j', type=int, help='并行生成或批改使用的进程数（默认1）；--serve 时为工作线程数（默认4）')
+        parser.add_argument('--constructive', action='store_true',
+                            help='构造式生成，每次尝试都得到合法题目，适合大量生成')
+        parser.add_argument('--exhaustive', action='store_true',
+                            help='枚举全部题目后均匀抽取，适合较小的数值范围')
+        parser.add_argument('--resume', action='store_true',
+                            help='在已有的题目/答案文件后续写，补足到 -n 道题目')
+        parser.add_argument('--progress', action='store_true',
+                            help='在标准错误中定期输出生成进度和统计（默认不输出）')
+        parser.add_argument('--seed', type=int,
+                            help='随机种子，相同的种子和参数生成相同的题目（默认随机并输出所用种子）')
+        parser.add_argument('--cache-dir', type=str, metavar='DIR',
+                            help='生成结果缓存目录，指定 --seed 时按参数和种子复用已生成的题目')
+        parser.add_argument('--min-answer', type=str, help='定向生成：答案下限，如 1 或 1/2')
+        parser.add_argument('--max-answer', type=str, help='定向生成：答案上限，如 10 或 2^1/2')
+        parser.add_argument('--max-denominator', type=int,
+                            help='定向生成：答案、操作数和中间结果的最大分母')
+        parser.add_argument('--operators', type=str,
+                            help='定向生成：允许的运算符，如 "+-" 或 "×÷"（也可用 * 和 /）')
+        parser.add_argument('--binary', type=str, metavar='FILE',
+                            help='将题目和答案写为二进制题目集，不生成文本文件')
+        parser.add_argument('--render', type=str, metavar='FILE',
+                            help='将二进制题目集渲染为 Exercises.txt 和 Answers.txt')
+        parser.add_argument('--history', type=str, metavar='FILE',
+                            help='题目历史文件，跳过以往生成过的题目并记录本次生成的题目')
+        parser.add_argument('--history-fp', type=float, default=0.001, metavar='RATE',
+                            help='新建历史文件时的误判率（默认0.001）')
         
         # 答案批改参数
         parser.add_argument('-e', type=str, help='题目文件路径')
-        parser.add_argument('-a', type=str, help='答案文件路径')
+        parser.add_argument('-a', type=str, help='答案文件路径，也可以是目录或通配符（批量批改）')
+        parser.add_argument('--stream', action='store_true',
+                            help='流式批改，适用于超大的题目/答案文件')
+        parser.add_argument('--vectorized', action='store_true',
+                            help='批量比较答案（安装NumPy时使用整数数组）')
+        parser.add_argument('--answer-cache', type=str, metavar='DIR',
+                            help='标准答案缓存目录，同一题目文件多次批改时复用标准答案')
+        parser.add_argument('--output-dir', type=str, default='.',
+                            help='批量批改时成绩文件和报告的输出目录（默认当前目录）')
+        
+        # 服务参数
+        parser.add_argument('--serve', type=str, metavar='ADDRESS',
+                            help='以HTTP服务方式运行，地址如 127.0.0.1:8000 或 unix:/tmp/math.sock，-j 为工作线程数')
         
         return parser
     
-    def generate_exercises(self, count: int, number_range: int):
+    def _parse_constraints(self, args: argparse.Namespace) -> GenerationConstraints:
+        """由命令行参数构造定向生成约束，未指定任何约束时返回None"""
+        if args.min_answer is None and args.max_answer is None and \
+                args.max_denominator is None and args.operators is None:
+            return None
+        return GenerationConstraints(
+            Fraction.from_string(args.min_answer) if args.min_answer is not None else None,
+            Fraction.from_string(args.max_answer) if args.max_answer is not None else None,
+            args.max_denominator, args.operators)
+    
+    def generate_exercises(self, count: int, number_range: int, workers: int = 1,
+                           constructive: bool = False, exhaustive: bool = False,
+                           resume: bool = False, progress: bool = False,
+                           history_file: str = None, history_fp: float = 0.001,
+                           seed: int = None, cache_dir: str = None, binary_file: str = None,
+                           constraints: GenerationConstraints = None):
         """
         生成题目和答案
         
         Args:
             count: 题目数量
             number_range: 数值范围
+            workers: 并行生成使用的进程数
+            constructive: 是否使用构造式生成
+            exhaustive: 是否枚举全部题目后抽取
+            resume: 是否在已有文件后续写
+            progress: 是否输出生成进度
+            history_file: 题目历史文件路径，不存在时新建
+            history_fp: 新建历史文件时的误判率
+            seed: 随机种子，默认随机选取
+            cache_dir: 生成结果缓存目录，只在指定种子、且不续写、不使用历史时生效
+            binary_file: 二进制题目集路径，指定时只写出二进制题目集
+            constraints: 定向生成约束
         """
         if count <= 0:
             raise ValueError("题目数量必须大于0")
         if number_range <= 1:
             raise ValueError("数值范围必须大于1")
+        if workers <= 0:
+            raise ValueError("进程数必须大于0")
+        if binary_file and resume:
+            raise ValueError("二进制题目集不支持续写")
+        if constraints is not None and exhaustive:
+            raise ValueError("定向生成不能与 --exhaustive 同时使用")
         if count > 10000:
             print("警告: 生成题目数量超过10000，可能需要较长时间")
         
-        # 初始化生成器
-        self.generator = ProblemGenerator(number_range)
+        # 结果完全由参数和种子决定时才使用缓存
+        cache, cache_key = None, None
+        if cache_dir and not binary_file and seed is not None and not resume and not history_file:
+            cache = WorksheetCache(cache_dir)
+            cache_key = WorksheetCache.make_key({
+                'algorithm': ALGORITHM_VERSION, 'n': count, 'r': number_range, 'seed': seed,
+                'constructive': constructive, 'exhaustive': exhaustive,
+                'workers': 1 if exhaustive else workers,
+                'constraints': constraints.describe() if constraints else None,
+            })
+            cached_count = cache.fetch(cache_key, 'Exercises.txt', 'Answers.txt')
+            if cached_count is not None:
+                print(f"使用缓存的 {cached_count} 道题目（随机种子: {seed}）")
+                print("题目文件: Exercises.txt")
+                print("答案文件: Answers.txt")
+                return
         
-        # 生成题目
-        problems = self.generator.generate_with_retry(count)
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
         
-        if not problems:
+        # 初始化生成器
+        progress_callback = ProgressReporter() if progress else None
+        history = ProblemHistory(history_file, fp_rate=history_fp) if history_file else None
+        try:
+            self.generator = ProblemGenerator(number_range, constructive, progress_callback, history, seed,
+                                              constraints)
+            if binary_file:
+                total_count = self._generate_binary(count, workers, exhaustive, binary_file)
+            else:
+                total_count = self._generate_and_write(count, workers, exhaustive, resume)
+        finally:
+            if history is not None:
+                history.close()
+        
+        if total_count == 0:
             raise ValueError("未能生成任何题目，请调整参数重试")
+        if cache is not None:
+            cache.store(cache_key, 'Exercises.txt', 'Answers.txt', total_count)
         
-        # 保存题目和答案
-        self._save_exercises(problems)
-        self._save_answers(problems)
+        print(f"成功生成 {total_count} 道题目（随机种子: {seed}）")
+        if binary_file:
+            print(f"二进制题目集: {binary_file}")
+        else:
+            print("题目文件: Exercises.txt")
+            print("答案文件: Answers.txt")
+    
+    def _generate_binary(self, count: int, workers: int, exhaustive: bool, binary_file: str) -> int:
+        """生成题目并写为二进制题目集，返回题目数量"""
+        if exhaustive or workers > 1:
+            problems = self.generator.generate_exhaustive(count) if exhaustive else \
+                self.generator.generate_problems_parallel(count, workers)
+            expressions = ((expr_parser.parse(problem), answer) for problem, answer in problems)
+        else:
+            expressions = self.generator.iter_expressions(count)
         
-        print(f"成功生成 {len(problems)} 道题目")
-        print("题目文件: Exercises.txt")
-        print("答案文件: Answers.txt")
+        total_count = write_problem_set(binary_file, expressions)
+        self.generator.commit_history()
+        return total_count
     
-    def _save_exercises(self, problems: List[Tuple[str, Fraction]]):
-        """保存题目到文件"""
-        with open('Exercises.txt', 'w', encoding='utf-8') as f:
-            for i, (problem, _) in enumerate(problems, 1):
-                f.write(f"{i}. {problem}\n")
+    def _generate_and_write(self, count: int, workers: int, exhaustive: bool, resume: bool) -> int:
+        """生成题目并写出，返回文件中的题目总数"""
+        # 准备输出文件，续写时恢复已有题目的去重状态
+        writer = ProblemWriter(resume=resume)
+        existing_count = writer.prepare()
+        if existing_count:
+            self.generator.load_existing(writer.existing_exercises())
+            print(f"已有 {existing_count} 道题目，继续生成")
+        remaining = count - existing_count
+        
+        # 生成题目，串行模式下边生成边写出
+        if remaining <= 0:
+            problems = []
+        elif exhaustive:
+            problems = self.generator.generate_exhaustive(remaining)
+        elif workers > 1:
+            # 与串行生成相同，只生成一轮，尝试预算用完即停止，进程数只影响速度
+            problems = self.generator.generate_problems_parallel(remaining, workers)
+        else:
+            problems = self.generator.iter_problems(remaining)
+        
+        # 保存题目和答案，保存完成后再记入历史
+        total_count = writer.write(problems)
+        self.generator.commit_history()
+        return total_count
     
-    def _save_answers(self, problems: List[Tuple[str, Fraction]]):
-        """保存答案到文件"""
-        with open('Answers.txt', 'w', encoding='utf-8') as f:
-            for i, (_, answer) in enumerate(problems, 1):
-                f.write(f"{i}. {answer.to_string()}\n")
+    def render_problem_set(self, binary_file: str):
+        """
+        将二进制题目集渲染为题目和答案文件
+        
+        Args:
+            binary_file: 二进制题目集路径
+        """
+        if not os.path.exists(binary_file):
+            raise FileNotFoundError(f"二进制题目集不存在: {binary_file}")
+        
+        with ProblemSet(binary_file) as problem_set:
+            writer = ProblemWriter()
+            writer.prepare()
+            total_count = writer.write(problem_set)
+        
+        print(f"已渲染 {total_count} 道题目")
+        print("题目文件: Exercises.txt")
+        print("答案文件: Answers.txt")
     
-    def check_answers(self, exercise_file: str, answer_file: str):
+    def check_answers(self, exercise_file: str, answer_file: str, stream: bool = False,
+                      vectorized: bool = False, workers: int = 1):
         """
         批改答案
         
         Args:
             exercise_file: 题目文件路径
             answer_file: 答案文件路径
+            stream: 是否使用流式批改
+            vectorized: 是否使用批量比较
+            workers: 并行批改使用的进程数
         """
         if not os.path.exists(exercise_file):
             raise FileNotFoundError(f"题目文件不存在: {exercise_file}")
         if not os.path.exists(answer_file):
             raise FileNotFoundError(f"答案文件不存在: {answer_file}")
+        if stream and workers > 1:
+            raise ValueError("流式批改只能单进程运行，不能与 -j 同时使用")
+        if stream and self.checker.answer_cache is not None:
+            raise ValueError("流式批改不读取标准答案缓存，不能与 --answer-cache 同时使用")
+        if vectorized and workers > 1:
+            raise ValueError("批量比较只能单进程运行，不能与 -j 同时使用")
         
         print(f"开始批改题目...")
         print(f"题目文件: {exercise_file}")
         print(f"答案文件: {answer_file}")
         
-        # 批改答案
-        result = self.checker.check_answers(exercise_file, answer_file)
-        
-        # 保存批改结果
-        self.checker.save_grade_result()
+        if stream:
+            # 流式批改，结果在批改过程中直接写入文件
+            result = self.checker.check_answers_streaming(exercise_file, answer_file)
+            print(f"批改结果已保存到: {result['output_file']}")
+        else:
+            # 批改答案
+            result = self.checker.check_answers(exercise_file, answer_file, vectorized, workers)
+            
+            # 保存批改结果
+            self.checker.save_grade_result()
         
         # 显示统计信息
         self._display_statistics(result)
     
+    def _is_batch_answer_path(self, answer_path: str) -> bool:
+        """答案路径为目录或通配符时使用批量批改"""
+        return os.path.isdir(answer_path) or glob.has_magic(answer_path)
+    
+    def check_submissions(self, exercise_file: str, answer_path: str, output_dir: str = '.',
+                          stream: bool = False, vectorized: bool = False, workers: int = 1):
+        """
+        批量批改多份答案
+        
+        Args:
+            exercise_file: 题目文件路径
+            answer_path: 答案文件目录或通配符
+            output_dir: 输出目录
+            stream, vectorized, workers: 批量批改不支持这些选项，指定时报错
+        """
+        if not os.path.exists(exercise_file):
+            raise FileNotFoundError(f"题目文件不存在: {exercise_file}")
+        unsupported = [flag for flag, used in (('--stream', stream), ('--vectorized', vectorized), ('-j', workers > 1))
+                       if used]
+        if unsupported:
+            raise ValueError(f"批量批改多份答案时不支持 {'、'.join(unsupported)}")
+        
+        if os.path.isdir(answer_path):
+            answer_files = sorted(glob.glob(os.path.join(answer_path, '*.txt')))
+        else:
+            answer_files = sorted(glob.glob(answer_path))
+        if not answer_files:
+            raise FileNotFoundError(f"没有找到答案文件: {answer_path}")
+        
+        print(f"开始批量批改 {len(answer_files)} 份答案...")
+        print(f"题目文件: {exercise_file}")
+        
+        result = self.checker.check_submissions(exercise_file, answer_files, output_dir)
+        
+        print("\n批改完成!")
+        for name, submission in result['submissions'].items():
+            total = submission['total_count']
+            accuracy = submission['correct_count'] / total * 100 if total else 0.0
+            print(f"{name}: 正确 {submission['correct_count']}/{total} ({accuracy:.1f}%) -> {submission['output_file']}")
+        print(f"每题正确率报告: {result['report_file']}")
+    
     def _display_statistics(self, result: dict):
         """显示统计信息"""
         print("\n批改完成!")
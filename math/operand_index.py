@@ -0,0 +1,192 @@
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+from fraction import Fraction
+from enumerator import leaf_values, OPERATORS
+
+# 单个索引允许的最大操作数对数量（叶子数的平方乘以运算符数），超过时改为筛选生成，
+# 避免数值范围过大时建索引耗时过长、耗尽内存（每百万对约需3秒）
+MAX_INDEX_PAIRS = 2000000
+
+_OPERATOR_ALIASES = {'*': '×', '/': '÷', 'x': '×'}
+
+
+class ConstraintError(ValueError):
+    """候选题目不满足定向生成的约束条件"""
+    pass
+
+
+def is_identity_operation(left: Fraction, operator: str, right: Fraction) -> bool:
+    """
+    是否为没有练习价值的平凡运算：加减0、乘除1、乘0以及0作被除数
+
+    Args:
+        left: 左操作数的值
+        operator: 运算符
+        right: 右操作数的值
+    """
+    if operator == '+':
+        return left.numerator == 0 or right.numerator == 0
+    if operator == '-':
+        return right.numerator == 0
+    if operator == '×':
+        return left.numerator == 0 or right.numerator == 0 or left == 1 or right == 1
+    return left.numerator == 0 or right == 1
+
+
+class GenerationConstraints:
+    """定向生成的约束条件"""
+
+    def __init__(self, min_answer: Optional[Fraction] = None, max_answer: Optional[Fraction] = None,
+                 max_denominator: Optional[int] = None, operators: Optional[Iterable[str]] = None):
+        """
+        初始化约束条件
+
+        Args:
+            min_answer: 答案下限（含），默认不限
+            max_answer: 答案上限（含），默认不限
+            max_denominator: 答案、操作数和中间结果的最大分母，默认不限
+            operators: 允许使用的运算符，如 "+-" 或 "×÷"（也接受 * 和 /），默认全部
+        """
+        if max_denominator is not None and max_denominator < 1:
+            raise ValueError("最大分母必须大于0")
+        if min_answer is not None and max_answer is not None and min_answer > max_answer:
+            raise ValueError("答案下限不能大于上限")
+        if operators is None:
+            operators = OPERATORS
+        operators = [_OPERATOR_ALIASES.get(op, op) for op in operators if not op.isspace()]
+        unknown = [op for op in operators if op not in OPERATORS]
+        if unknown:
+            raise ValueError(f"未知的运算符: {''.join(unknown)}")
+        if not operators:
+            raise ValueError("至少需要一个运算符")
+
+        self.min_answer = min_answer
+        self.max_answer = max_answer
+        self.max_denominator = max_denominator
+        # 按固定顺序去重，使同一组约束总是得到相同的索引
+        self.operators = tuple(op for op in OPERATORS if op in operators)
+
+    def describe(self) -> Dict[str, Optional[str]]:
+        """约束条件的可序列化形式，用于日志和缓存键"""
+        return {
+            'min_answer': self.min_answer.to_string() if self.min_answer is not None else None,
+            'max_answer': self.max_answer.to_string() if self.max_answer is not None else None,
+            'max_denominator': self.max_denominator,
+            'operators': ''.join(self.operators),
+        }
+
+    def accepts_answer(self, value: Fraction) -> bool:
+        """答案是否满足约束"""
+        if self.min_answer is not None and value < self.min_answer:
+            return False
+        if self.max_answer is not None and value > self.max_answer:
+            return False
+        return self.max_denominator is None or value.denominator <= self.max_denominator
+
+
+def _leaf_count(number_range: int, max_denominator: Optional[int]) -> int:
+    """数值范围内分母不超过 max_denominator 的叶子数（整数加上各分母的最简真分数个数）"""
+    limit = number_range if max_denominator is None else min(number_range, max_denominator)
+    # 欧拉函数筛：分母为 d 的最简真分数恰有 phi(d) 个
+    phi = list(range(limit + 1))
+    for d in range(2, limit + 1):
+        if phi[d] == d:
+            for multiple in range(d, limit + 1, d):
+                phi[multiple] -= phi[multiple] // d
+    return number_range + sum(phi[2:])
+
+
+def index_fits(number_range: int, constraints: GenerationConstraints) -> bool:
+    """指定数值范围和约束的索引是否不超过 MAX_INDEX_PAIRS，不构建索引"""
+    leaf_count = _leaf_count(number_range, constraints.max_denominator)
+    return leaf_count * leaf_count * len(constraints.operators) <= MAX_INDEX_PAIRS
+
+
+class OperandIndex:
+    """
+    按结果值分组的操作数对索引
+
+    对数值范围内满足约束的所有叶子两两组合，按运算结果分组记录合法的
+    (左叶子, 运算符, 右叶子)，平凡运算（见 is_identity_operation）不计入。生成时先从满足答案约束的结果中抽取题目的值，
+    再把叶子逐个替换为结果等于该叶子值的操作数对来增加运算符，
+    所有中间结果都是索引中的值，因此每次尝试都直接得到满足约束的题目。
+    """
+
+    def __init__(self, number_range: int, constraints: GenerationConstraints):
+        """
+        构建索引
+
+        Args:
+            number_range: 数值范围
+            constraints: 约束条件
+        """
+        max_denominator = constraints.max_denominator
+        self.leaves: List[Fraction] = [value for value in leaf_values(number_range)
+                                       if max_denominator is None or value.denominator <= max_denominator]
+        self.operators = constraints.operators
+        leaf_count = len(self.leaves)
+        if leaf_count * leaf_count * len(self.operators) > MAX_INDEX_PAIRS:
+            raise ValueError("数值范围过大，无法建立定向生成索引，请减小数值范围或限制最大分母")
+
+        # 结果值 -> 编码后的操作数对列表，编码为 (左叶子序号 * 叶子数 + 右叶子序号) * 4 + 运算符序号
+        pairs: Dict[Fraction, List[int]] = {}
+        for i, left in enumerate(self.leaves):
+            for j, right in enumerate(self.leaves):
+                pair_code = (i * leaf_count + j) * 4
+                for op_index, operator in enumerate(self.operators):
+                    if is_identity_operation(left, operator, right):
+                        continue
+                    if operator == '+':
+                        value = left + right
+                    elif operator == '-':
+                        if left < right:
+                            continue
+                        value = left - right
+                    elif operator == '×':
+                        value = left * right
+                    else:
+                        if right.numerator == 0:
+                            continue
+                        value = left / right
+                    if max_denominator is not None and value.denominator > max_denominator:
+                        continue
+                    pairs.setdefault(value, []).append(pair_code + op_index)
+        self.pairs = pairs
+
+        # 满足答案约束的结果值，按操作数对数量加权，相当于在所有单运算符题目中均匀抽取
+        self.targets = [value for value in pairs if constraints.accepts_answer(value)]
+        self.target_weights = list(accumulate(len(pairs[value]) for value in self.targets))
+
+    def sample_target(self, rng) -> Fraction:
+        """抽取一个满足答案约束的结果值"""
+        if not self.targets:
+            raise ValueError("没有满足约束条件的题目")
+        return rng.choices(self.targets, cum_weights=self.target_weights)[0]
+
+    def sample_pair(self, value: Fraction, rng) -> Optional[Tuple[Fraction, str, Fraction]]:
+        """
+        抽取一个结果等于 value 的操作数对
+
+        Returns:
+            (左操作数, 运算符, 右操作数)，没有这样的操作数对时返回None
+        """
+        codes = self.pairs.get(value)
+        if not codes:
+            return None
+        code = codes[rng.randrange(len(codes))]
+        pair_code, op_index = divmod(code, 4)
+        i, j = divmod(pair_code, len(self.leaves))
+        return self.leaves[i], self.operators[op_index], self.leaves[j]
+
+
+_INDEX_CACHE: Dict[tuple, OperandIndex] = {}
+
+
+def get_operand_index(number_range: int, constraints: GenerationConstraints) -> OperandIndex:
+    """获取（或构建）指定数值范围和约束的索引，每个进程内只构建一次"""
+    key = (number_range, constraints.max_denominator, constraints.operators,
+           constraints.min_answer, constraints.max_answer)
+    index = _INDEX_CACHE.get(key)
+    if index is None:
+        index = _INDEX_CACHE[key] = OperandIndex(number_range, constraints)
+    return index
@@ -0,0 +1,155 @@
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+from fraction import Fraction
+from expression import (Expression, OPERATOR_CODES, COMMUTATIVE_CODES, _apply_operator, _PRIORITIES,
+                        canonical_leaf_key, combine_canonical_keys)
+from leaf_pool import LeafPool, get_leaf_pool
+from enumerator import leaf_values
+
+_OPERATORS = {-code: operator for operator, code in OPERATOR_CODES.items()}
+_LEAF_PRIORITY = 3
+
+
+class PostfixCodec:
+    """
+    表达式的紧凑后缀形式
+
+    一个表达式表示为一个小整数元组：非负数为叶子表中的序号，负数为运算符编码的相反数，
+    例如 (0, 5, -1) 表示 叶子0 + 叶子5。三个运算符的表达式只占一个7元素的元组，
+    而不是7个表达式对象和它们的分数，可以大量保存在内存中，也可以低成本地在进程间传递。
+    求值、渲染和规范化都直接在后缀形式上完成，结果与 Expression 的对应方法一致。
+    """
+
+    def __init__(self, leaves: Sequence[Fraction], growable: bool = False):
+        """
+        初始化编码器
+
+        Args:
+            leaves: 叶子表，后缀形式中的叶子序号指向该表
+            growable: 编码时遇到不在叶子表中的值是否追加到表尾（否则抛出 ValueError）
+        """
+        self.leaves: List[Fraction] = list(leaves)
+        self.growable = growable
+        self._leaf_ids: Dict[Fraction, int] = {value: i for i, value in enumerate(self.leaves)}
+        self._leaf_strings = [value.to_string() for value in self.leaves]
+        self._leaf_keys = [canonical_leaf_key(value) for value in self.leaves]
+
+    def leaf_id(self, value: Fraction) -> int:
+        """叶子值在叶子表中的序号"""
+        leaf_id = self._leaf_ids.get(value)
+        if leaf_id is None:
+            if not self.growable:
+                raise ValueError(f"叶子值不在叶子表中: {value}")
+            leaf_id = self._leaf_ids[value] = len(self.leaves)
+            self.leaves.append(value)
+            self._leaf_strings.append(value.to_string())
+            self._leaf_keys.append(canonical_leaf_key(value))
+        return leaf_id
+
+    def encode(self, expr: Expression) -> Tuple[int, ...]:
+        """将表达式编码为后缀形式"""
+        code = []
+        stack = [(expr, False)]
+        while stack:
+            node, visited = stack.pop()
+            if node.is_leaf():
+                code.append(self.leaf_id(node.value))
+            elif visited:
+                code.append(-OPERATOR_CODES[node.operator])
+            else:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        return tuple(code)
+
+    def decode(self, code: Sequence[int]) -> Expression:
+        """由后缀形式重建表达式"""
+        stack = []
+        leaves = self.leaves
+        for token in code:
+            if token >= 0:
+                stack.append(Expression(value=leaves[token]))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(Expression(left=left, right=right, operator=_OPERATORS[token]))
+        return _single(stack)
+
+    def evaluate(self, code: Sequence[int]) -> Fraction:
+        """
+        单遍计算后缀形式的值
+
+        Raises:
+            NegativeResultError: 减法结果为负数
+            DivisionByZeroError: 除数为零
+        """
+        return evaluate_postfix(code, self.leaves)
+
+    def to_string(self, code: Sequence[int]) -> str:
+        """渲染为题目文本，括号规则与 Expression.to_string 相同"""
+        return render_postfix(code, self._leaf_strings)
+
+    def canonical_key(self, code: Sequence[int]) -> tuple:
+        """规范键，与 Expression.canonical_key 相同"""
+        return canonical_key_postfix(code, self._leaf_keys)
+
+
+def evaluate_postfix(code: Sequence[int], leaves: Sequence[Fraction]) -> Fraction:
+    """在后缀形式上求值，leaves 为叶子序号对应的值"""
+    stack = []
+    for token in code:
+        if token >= 0:
+            stack.append(leaves[token])
+        else:
+            right = stack.pop()
+            stack[-1] = _apply_operator(_OPERATORS[token], stack[-1], right)
+    return _single(stack)
+
+
+def render_postfix(code: Sequence[int], leaf_strings: Sequence[str]) -> str:
+    """将后缀形式渲染为文本，leaf_strings 为叶子序号对应的文本"""
+    # 栈中为 (文本, 优先级, 运算符)
+    stack = []
+    for token in code:
+        if token >= 0:
+            stack.append((leaf_strings[token], _LEAF_PRIORITY, None))
+            continue
+        operator = _OPERATORS[token]
+        priority = _PRIORITIES[operator]
+        right, right_priority, right_operator = stack.pop()
+        left, left_priority, _ = stack.pop()
+        if left_priority < priority:
+            left = f"({left})"
+        # 右侧同级子表达式只有同为 + 或 × 时才省略括号，与 Expression.to_string 相同
+        if right_priority < priority or (right_priority == priority and
+                                         not (right_operator == operator and -token in COMMUTATIVE_CODES)):
+            right = f"({right})"
+        stack.append((f"{left} {operator} {right}", priority, operator))
+    return _single(stack)[0]
+
+
+def canonical_key_postfix(code: Sequence[int], leaf_keys: Sequence[tuple]) -> tuple:
+    """在后缀形式上计算规范键，leaf_keys 为叶子序号对应的规范键"""
+    stack = []
+    for token in code:
+        if token >= 0:
+            stack.append(leaf_keys[token])
+        else:
+            right = stack.pop()
+            stack[-1] = combine_canonical_keys(-token, stack[-1], right)
+    return _single(stack)
+
+
+def _single(stack: list):
+    if len(stack) != 1:
+        raise ValueError("后缀表达式格式错误")
+    return stack[0]
+
+
+@lru_cache(maxsize=8)
+def get_codec(number_range: int) -> PostfixCodec:
+    """获取指定数值范围的编码器，数值范围较小时叶子表与 leaf_pool 共享"""
+    pool = get_leaf_pool(number_range)
+    if isinstance(pool, LeafPool):
+        return PostfixCodec(pool.values)
+    return PostfixCodec(leaf_values(number_range))
@@ -0,0 +1,194 @@
+import mmap
+import struct
+import tempfile
+from array import array
+from typing import Iterable, Iterator, Tuple
+from fraction import Fraction
+from expression import Expression
+from postfix import PostfixCodec
+
+_MAGIC = b'PSB1'
+_HEADER = struct.Struct('<4sIQQQ4s4x')  # 魔数, 版本, 题目数量, 后缀记号总数, 叶子数, 四个整数段的数组类型码
+_VERSION = 2
+_BATCH_SIZE = 10000
+_COPY_ITEMS = 1 << 16
+
+# 按取值范围从窄到宽选用的整数数组类型
+_TYPECODES = 'bhiq'
+
+
+def _narrowest_typecode(low: int, high: int) -> str:
+    """能容纳 [low, high] 的最窄整数数组类型码"""
+    for typecode in _TYPECODES:
+        bits = array(typecode).itemsize * 8 - 1
+        if -(1 << bits) <= low and high < (1 << bits):
+            return typecode
+    raise OverflowError("数值超出int64范围")
+
+
+def _copy_narrowed(source, out, typecode: str):
+    """将临时文件中的int64数组转换为 typecode 类型写出"""
+    source.seek(0)
+    while True:
+        chunk = array('q')
+        data = source.read(_COPY_ITEMS * chunk.itemsize)
+        if not data:
+            break
+        chunk.frombytes(data)
+        out.write(chunk.tobytes() if typecode == 'q' else array(typecode, chunk).tobytes())
+
+
+def write_problem_set(path: str, problems: Iterable[Tuple[Expression, Fraction]]) -> int:
+    """
+    将题目和答案写为二进制题目集
+
+    题目以 PostfixCodec 的后缀形式保存，叶子序号指向文件自带的叶子表。
+    文件依次包含：文件头、每道题的后缀记号起始位置（题目数量+1个）、
+    全部后缀记号、叶子表（分子分母对）、全部答案（分子分母对）。
+    四个整数段各自选用能容纳其取值的最窄整数类型，类型码记录在文件头中。
+    后缀记号等逐题增长的段先以int64分别写入临时文件，写出过程中只在内存中保留一批题目和叶子表。
+
+    Args:
+        path: 输出文件路径
+        problems: 表达式和答案的可迭代对象
+
+    Returns:
+        题目数量
+    """
+    codec = PostfixCodec([], growable=True)
+    count = 0
+    token_count = 0
+    token_range = [0, 0]
+    answer_range = [0, 0]
+    with tempfile.TemporaryFile() as offsets_file, tempfile.TemporaryFile() as tokens_file, \
+            tempfile.TemporaryFile() as answers_file:
+        offsets, tokens, answers = array('q', [0]), array('q'), array('q')
+
+        def flush():
+            for values, value_range in ((tokens, token_range), (answers, answer_range)):
+                if values:
+                    value_range[0] = min(value_range[0], min(values))
+                    value_range[1] = max(value_range[1], max(values))
+            offsets.tofile(offsets_file)
+            tokens.tofile(tokens_file)
+            answers.tofile(answers_file)
+            del offsets[:], tokens[:], answers[:]
+
+        for expr, answer in problems:
+            code = codec.encode(expr)
+            tokens.extend(code)
+            answers.append(answer.numerator)
+            answers.append(answer.denominator)
+            token_count += len(code)
+            offsets.append(token_count)
+            count += 1
+            if count % _BATCH_SIZE == 0:
+                flush()
+        flush()
+
+        leaves = array('q')
+        for value in codec.leaves:
+            leaves.append(value.numerator)
+            leaves.append(value.denominator)
+        typecodes = (_narrowest_typecode(0, token_count), _narrowest_typecode(*token_range),
+                     _narrowest_typecode(min(leaves, default=0), max(leaves, default=0)),
+                     _narrowest_typecode(*answer_range))
+        with open(path, 'wb') as out:
+            out.write(_HEADER.pack(_MAGIC, _VERSION, count, token_count, len(codec.leaves),
+                                   ''.join(typecodes).encode('ascii')))
+            _copy_narrowed(offsets_file, out, typecodes[0])
+            _copy_narrowed(tokens_file, out, typecodes[1])
+            out.write(array(typecodes[2], leaves).tobytes())
+            _copy_narrowed(answers_file, out, typecodes[3])
+    return count
+
+
+class ProblemSet:
+    """
+    通过内存映射读取的二进制题目集
+
+    只在访问某道题时解码该题，迭代时逐道渲染为题目文本，
+    可直接交给 ProblemWriter 写出 Exercises.txt/Answers.txt。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开题目集
+
+        Args:
+            path: 题目集文件路径
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self._count, token_count, leaf_count, typecodes = _HEADER.unpack_from(self._map)
+            typecodes = typecodes.decode('ascii')
+        except (struct.error, UnicodeDecodeError):
+            magic, version, typecodes = None, None, ''
+        if magic != _MAGIC or version != _VERSION or not set(typecodes) <= set(_TYPECODES):
+            self._map.close()
+            raise ValueError(f"不是二进制题目集文件: {path}")
+
+        count = self._count
+        itemsizes = [array(typecode).itemsize for typecode in typecodes]
+        sizes = [(count + 1) * itemsizes[0], token_count * itemsizes[1],
+                 leaf_count * 2 * itemsizes[2], count * 2 * itemsizes[3]]
+        if _HEADER.size + sum(sizes) != len(self._map):
+            self._map.close()
+            raise ValueError(f"二进制题目集文件不完整: {path}")
+
+        view = memoryview(self._map)
+        self._views = [view]
+        start = _HEADER.size
+        for size in sizes:
+            self._views.append(view[start:start + size])
+            start += size
+        self._views.extend(section.cast(typecode) for section, typecode in zip(self._views[1:], typecodes))
+        self._offsets, self._tokens, leaves, self._answers = self._views[5:]
+        self._codec = PostfixCodec([Fraction._from_reduced(leaves[i], leaves[i + 1])
+                                    for i in range(0, len(leaves), 2)])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("题目序号超出范围")
+        return index
+
+    def _code(self, index: int):
+        index = self._check_index(index)
+        return self._tokens[self._offsets[index]:self._offsets[index + 1]]
+
+    def expression(self, index: int) -> Expression:
+        """解码第 index 道题（从0开始）的表达式"""
+        return self._codec.decode(self._code(index))
+
+    def answer(self, index: int) -> Fraction:
+        """第 index 道题（从0开始）的答案"""
+        index = self._check_index(index)
+        return Fraction._from_reduced(self._answers[2 * index], self._answers[2 * index + 1])
+
+    def problem(self, index: int) -> str:
+        """第 index 道题（从0开始）的题目文本，直接由后缀形式渲染，不构建表达式对象"""
+        return f"{self._codec.to_string(self._code(index))} ="
+
+    def __iter__(self) -> Iterator[Tuple[str, Fraction]]:
+        """逐道渲染题目文本和答案"""
+        for index in range(self._count):
+            yield self.problem(index), self.answer(index)
+
+    def close(self):
+        """关闭题目集"""
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+
+    def __enter__(self) -> 'ProblemSet':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,107 @@
+import sys
+import time
+from typing import Dict, Optional, TextIO
+from expression import NegativeResultError, DivisionByZeroError
+from operand_index import ConstraintError
+
+# 表达式被丢弃的原因
+REJECT_NEGATIVE = 'negative'
+REJECT_ZERO_DIVISION = 'zero_division'
+REJECT_DUPLICATE = 'duplicate'
+REJECT_INVALID = 'invalid'
+REJECT_CONSTRAINT = 'constraint'
+
+REJECT_REASON_NAMES = {
+    REJECT_NEGATIVE: '负数',
+    REJECT_ZERO_DIVISION: '除零',
+    REJECT_DUPLICATE: '重复',
+    REJECT_CONSTRAINT: '不满足约束',
+    REJECT_INVALID: '其他',
+}
+
+
+class GenerationStats:
+    """题目生成过程的统计信息"""
+
+    def __init__(self):
+        self.target = 0  # 要求生成的题目数量
+        self.attempts = 0  # 尝试生成的候选题目数量
+        self.accepted = 0  # 接受的题目数量
+        self.rejections: Dict[str, int] = dict.fromkeys(REJECT_REASON_NAMES, 0)  # 按原因统计被整体丢弃的候选表达式
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+
+    def start(self, target: int):
+        """开始新一轮生成，清空统计"""
+        self.__init__()
+        self.target = target
+
+    def finish(self):
+        """结束本轮生成"""
+        self.end_time = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.end_time is not None
+
+    def reject(self, reason: str, count: int = 1):
+        """记录被丢弃的表达式"""
+        self.rejections[reason] += count
+
+    def reject_error(self, error: Exception):
+        """按异常类型记录被丢弃的表达式"""
+        if isinstance(error, NegativeResultError):
+            self.reject(REJECT_NEGATIVE)
+        elif isinstance(error, (DivisionByZeroError, ZeroDivisionError)):
+            self.reject(REJECT_ZERO_DIVISION)
+        elif isinstance(error, ConstraintError):
+            self.reject(REJECT_CONSTRAINT)
+        else:
+            self.reject(REJECT_INVALID)
+
+    def merge(self, attempts: int, rejections: Dict[str, int]):
+        """合并工作进程的统计"""
+        self.attempts += attempts
+        for reason, count in rejections.items():
+            self.rejections[reason] += count
+
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return (self.end_time or time.time()) - self.start_time
+
+    def throughput(self) -> float:
+        """每秒生成的题目数量"""
+        elapsed = self.elapsed()
+        return self.accepted / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """单行统计摘要"""
+        rejections = ', '.join(f"{REJECT_REASON_NAMES[reason]} {count}"
+                               for reason, count in self.rejections.items() if count)
+        return (f"已生成 {self.accepted}/{self.target} 道题目，尝试 {self.attempts} 次，"
+                f"丢弃: {rejections or '无'}，速度 {self.throughput():.0f} 道/秒")
+
+
+class ProgressReporter:
+    """限速的进度输出，可作为 ProblemGenerator 的 progress_callback 使用"""
+
+    def __init__(self, interval: float = 1.0, stream: TextIO = None):
+        """
+        初始化进度输出
+
+        Args:
+            interval: 两次输出之间的最短间隔（秒）
+            stream: 输出流，默认为标准错误
+        """
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._last_report = 0.0
+
+    def __call__(self, stats: GenerationStats):
+        now = time.monotonic()
+        if not stats.finished and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        print(stats.summary(), file=self.stream)
+        if stats.finished:
+            print(f"题目生成完成，耗时: {stats.elapsed():.2f} 秒", file=self.stream)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+题目生成和批改服务
+常驻进程中保持生成器和标准答案的热状态，通过 HTTP 提供接口，不依赖第三方库。
+
+接口:
+  GET  /health     健康检查
+  POST /generate   {"n": 10, "r": 10, "constructive": false, "seed": null}
+  POST /grade      {"exercises": ["1. 1 + 2 =", ...], "answers": ["1. 3", ...]}
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from fraction import Fraction
+from generator import ProblemGenerator
+from checker import AnswerChecker
+
+_STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ServiceError(Exception):
+    """请求错误，携带HTTP状态码"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ExerciseService:
+    """服务状态：按参数复用的生成器和按题目内容缓存的标准答案"""
+
+    def __init__(self, max_count: int = 100000, max_answer_keys: int = 256,
+                 max_range: int = 10000, max_generators: int = 16):
+        """
+        初始化服务状态
+
+        Args:
+            max_count: 单次请求最多生成的题目数量
+            max_answer_keys: 内存中最多保留的标准答案组数
+            max_range: 允许的最大数值范围
+            max_generators: 内存中最多保留的生成器个数
+        """
+        self.max_count = max_count
+        self.max_answer_keys = max_answer_keys
+        self.max_range = max_range
+        self.max_generators = max_generators
+        self._generators: 'OrderedDict[Tuple[int, bool], Tuple[ProblemGenerator, threading.Lock]]' = OrderedDict()
+        self._generators_lock = threading.Lock()
+        self._answer_keys: 'OrderedDict[str, Dict[int, Optional[Fraction]]]' = OrderedDict()
+        self._answer_keys_lock = threading.Lock()
+
+    def _generator(self, number_range: int, constructive: bool) -> Tuple[ProblemGenerator, threading.Lock]:
+        """获取（或创建）指定参数的生成器，最近使用的若干个保留在内存中"""
+        with self._generators_lock:
+            key = (number_range, constructive)
+            if key in self._generators:
+                self._generators.move_to_end(key)
+            else:
+                self._generators[key] = (ProblemGenerator(number_range, constructive), threading.Lock())
+                while len(self._generators) > self.max_generators:
+                    self._generators.popitem(last=False)
+            return self._generators[key]
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        生成题目，同一次请求内的题目互不重复
+
+        Args:
+            payload: {"n": 题目数量, "r": 数值范围, "constructive": 是否构造式生成, "seed": 随机种子}
+
+        Returns:
+            {"problems": [{"exercise": 题目, "answer": 答案}, ...]}
+        """
+        count = payload.get('n')
+        number_range = payload.get('r')
+        if not isinstance(count, int) or not isinstance(number_range, int):
+            raise ServiceError(400, "n 和 r 必须为整数")
+        if not 0 < count <= self.max_count:
+            raise ServiceError(400, f"题目数量必须在1到{self.max_count}之间")
+        if not 1 < number_range <= self.max_range:
+            raise ServiceError(400, f"数值范围必须在2到{self.max_range}之间")
+
+        constructive = bool(payload.get('constructive', False))
+        seed = payload.get('seed')
+        if seed is not None:
+            if not isinstance(seed, int):
+                raise ServiceError(400, "seed 必须为整数")
+            problems = ProblemGenerator(number_range, constructive, seed=seed).generate_problems(count)
+        else:
+            generator, lock = self._generator(number_range, constructive)
+            with lock:
+                # 去重集合只在一次请求内有效，避免常驻进程中无限增长
+                generator.clear_cache()
+                problems = generator.generate_problems(count)
+
+        return {'problems': [{'exercise': problem, 'answer': answer.to_string()}
+                             for problem, answer in problems]}
+
+    def _answer_key(self, checker: AnswerChecker, exercise_lines: List[str],
+                    exercises: List[Tuple[int, str]]) -> Dict[int, Optional[Fraction]]:
+        """按题目内容获取标准答案，最近使用的若干组保留在内存中"""
+        digest = hashlib.sha256('\n'.join(exercise_lines).encode('utf-8')).hexdigest()
+        with self._answer_keys_lock:
+            if digest in self._answer_keys:
+                self._answer_keys.move_to_end(digest)
+                return self._answer_keys[digest]
+
+        answer_key = checker._build_answer_key(exercises)
+        with self._answer_keys_lock:
+            self._answer_keys[digest] = answer_key
+            while len(self._answer_keys) > self.max_answer_keys:
+                self._answer_keys.popitem(last=False)
+        return answer_key
+
+    def grade(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        批改答案
+
+        Args:
+            payload: {"exercises": 题目文件的各行, "answers": 答案文件的各行}
+
+        Returns:
+            与 AnswerChecker.check_answers 相同的批改结果
+        """
+        exercise_lines = payload.get('exercises')
+        answer_lines = payload.get('answers')
+        if not isinstance(exercise_lines, list) or not isinstance(answer_lines, list):
+            raise ServiceError(400, "exercises 和 answers 必须为字符串列表")
+
+        checker = AnswerChecker()
+        exercises = checker._parse_exercises(exercise_lines)
+        answers = checker._parse_answers(answer_lines)
+        checker._answer_key = self._answer_key(checker, exercise_lines, exercises)
+        return checker._grade_exercises(exercises, answers)
+
+
+class ExerciseServer:
+    """基于 asyncio 的 HTTP 服务，计算在线程池中执行，事件循环只负责收发请求"""
+
+    def __init__(self, service: ExerciseService, workers: int = 4, max_body_size: int = 64 << 20):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_body_size = max_body_size
+        self._routes = {
+            ('GET', '/health'): lambda payload: {'status': 'ok'},
+            ('POST', '/generate'): service.generate,
+            ('POST', '/grade'): service.grade,
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接上的一个请求"""
+        try:
+            status, body = await self._handle_request(reader)
+        except ServiceError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            status, body = 500, {'error': str(e)}
+
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1') + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise ServiceError(400, "请求格式错误")
+        method, path = request_line[0].upper(), request_line[1].split('?')[0]
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise ServiceError(400, "Content-Length 不合法")
+        if length < 0:
+            raise ServiceError(400, "Content-Length 不合法")
+        if length > self.max_body_size:
+            raise ServiceError(413, "请求体过大")
+        payload = {}
+        if length:
+            try:
+                payload = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise ServiceError(400, "请求体不是合法的JSON")
+            if not isinstance(payload, dict):
+                raise ServiceError(400, "请求体必须为JSON对象")
+
+        handler = self._routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self._routes):
+                raise ServiceError(405, f"不支持的方法: {method}")
+            raise ServiceError(404, f"未知接口: {path}")
+
+        loop = asyncio.get_running_loop()
+        return 200, await loop.run_in_executor(self.executor, handler, payload)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000,
+                    unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+        """开始监听TCP端口或Unix套接字"""
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def serve(address: str, workers: int = 4):
+    """
+    启动服务并一直运行
+
+    Args:
+        address: "host:port"、"port" 或 "unix:/path/to.sock"
+        workers: 线程池大小
+    """
+    server = ExerciseServer(ExerciseService(), workers)
+    if address.startswith('unix:'):
+        host, port, unix_path = None, None, address[len('unix:'):]
+    else:
+        host, _, port = address.rpartition(':')
+        host, port, unix_path = host or '127.0.0.1', int(port), None
+
+    async def run():
+        listener = await server.start(host, port, unix_path)
+        print(f"服务已启动: {address}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='题目生成和批改服务')
+    parser.add_argument('address', nargs='?', default='127.0.0.1:8000',
+                        help='监听地址，如 127.0.0.1:8000 或 unix:/tmp/math.sock')
+    parser.add_argument('-j', type=int, default=4, help='工作线程数（默认4）')
+    args = parser.parse_args()
+    serve(args.address, args.j)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,27 @@
 """测试用例"""
 
 import unittest
+import asyncio
+import contextlib
+import io
+import json
 import os
 import tempfile
 from fraction import Fraction
 from expression import Expression
 from generator import ProblemGenerator
 from checker import AnswerChecker
+import expr_parser
+import enumerator
+from writer import ProblemWriter
+from answer_cache import AnswerKeyCache
+from server import ExerciseService, ExerciseServer
+from history import ProblemHistory
+from worksheet_cache import WorksheetCache
+from problem_set import ProblemSet, write_problem_set
+from operand_index import GenerationConstraints, index_fits, is_identity_operation
+from leaf_pool import get_leaf_pool
+from postfix import PostfixCodec, get_codec
 
 class TestFraction(unittest.TestCase):
     """分数类测试"""
@@ -30,6 +45,140 @@ class TestFraction(unittest.TestCase):
         self.assertEqual(whole, 2)
         self.assertEqual(num, 1)
         self.assertEqual(den, 2)
+    
+    def test_immutable_and_hashable(self):
+        f = Fraction(2, 4)
+        with self.assertRaises(AttributeError):
+            f.numerator = 3
+        self.assertEqual(len({Fraction(1, 2), Fraction(2, 4), Fraction(3, 6)}), 1)
+        self.assertEqual(hash(Fraction(6, 3)), hash(2))
+    
+    def test_int_operands(self):
+        self.assertEqual(Fraction(1, 2) + 1, Fraction(3, 2))
+        self.assertEqual(1 - Fraction(1, 3), Fraction(2, 3))
+        self.assertEqual(2 * Fraction(3, 4), Fraction(3, 2))
+        self.assertEqual(1 / Fraction(2, 3), Fraction(3, 2))
+        self.assertEqual(Fraction(4, 2), 2)
+    
+    def test_matches_standard_library(self):
+        import fractions
+        import random
+        rng = random.Random(1)
+        for _ in range(2000):
+            a = (rng.randint(-20, 20), rng.randint(1, 12))
+            b = (rng.randint(-20, 20), rng.randint(1, 12))
+            x, y = Fraction(*a), Fraction(*b)
+            px, py = fractions.Fraction(*a), fractions.Fraction(*b)
+            results = [(x + y, px + py), (x - y, px - py), (x * y, px * py)]
+            if b[0] != 0:
+                results.append((x / y, px / py))
+            for ours, theirs in results:
+                self.assertEqual((ours.numerator, ours.denominator),
+                                 (theirs.numerator, theirs.denominator))
+
+class TestExpression(unittest.TestCase):
+    """表达式类测试"""
+    
+    def test_canonical_key_commutative(self):
+        a = Expression(value=Fraction(1, 2))
+        b = Expression(value=Fraction(3, 1))
+        self.assertEqual(Expression(left=a, right=b, operator='+').canonical_key,
+                         Expression(left=b, right=a, operator='+').canonical_key)
+        self.assertNotEqual(Expression(left=b, right=a, operator='-').canonical_key,
+                            Expression(left=a, right=b, operator='-').canonical_key)
+    
+    def test_canonical_key_matches_normalized_form(self):
+        generator = ProblemGenerator(5)
+        exprs = [generator.generate_single_expression(2) for _ in range(300)]
+        for x in exprs[:50]:
+            for y in exprs:
+                self.assertEqual(x.canonical_key == y.canonical_key,
+                                 x.normalized_form() == y.normalized_form())
+
+    def test_deep_expression_without_recursion(self):
+        import sys
+        # 左偏的长链：1 + 1 + ... + 1，深度远超递归上限
+        depth = sys.getrecursionlimit() * 2
+        expr = Expression(value=Fraction(1, 1))
+        for _ in range(depth):
+            expr = Expression(left=expr, right=Expression(value=Fraction(1, 1)), operator='+')
+        
+        self.assertEqual(expr.evaluate(), Fraction(depth + 1, 1))
+        self.assertEqual(expr.get_operator_count(), depth)
+        self.assertEqual(expr.to_string(), ' + '.join(['1'] * (depth + 1)))
+        self.assertEqual(expr.normalized_form(), '(' + '+'.join(['1'] * (depth + 1)) + ')')
+        # 整条加法链展开为一个运算的全部操作数
+        self.assertEqual(len(expr.canonical_key[1]), depth + 1)
+    
+    def test_associative_chains_share_key(self):
+        def leaf(n):
+            return Expression(value=Fraction(n, 1))
+        
+        def node(left, operator, right):
+            return Expression(left=left, right=right, operator=operator)
+        
+        forms = [node(node(leaf(1), '+', leaf(2)), '+', leaf(3)),
+                 node(leaf(1), '+', node(leaf(2), '+', leaf(3))),
+                 node(leaf(3), '+', node(leaf(2), '+', leaf(1)))]
+        self.assertEqual(len({expr.canonical_key for expr in forms}), 1)
+        self.assertEqual(len({expr.normalized_form() for expr in forms}), 1)
+        # 乘法链同样展开，但不跨越加法
+        product = node(node(leaf(2), '×', leaf(3)), '×', node(leaf(1), '+', leaf(4)))
+        regrouped = node(leaf(2), '×', node(node(leaf(4), '+', leaf(1)), '×', leaf(3)))
+        self.assertEqual(product.canonical_key, regrouped.canonical_key)
+        # 减法和除法不满足结合律，分组不同即为不同的题目
+        self.assertNotEqual(node(node(leaf(9), '-', leaf(3)), '-', leaf(2)).canonical_key,
+                            node(leaf(9), '-', node(leaf(3), '-', leaf(2))).canonical_key)
+        self.assertNotEqual(node(node(leaf(1), '+', leaf(2)), '×', leaf(3)).canonical_key,
+                            node(leaf(1), '+', node(leaf(2), '×', leaf(3))).canonical_key)
+    
+    def test_postfix_matches_expression(self):
+        import pickle
+        codec = get_codec(10)
+        generator = ProblemGenerator(10, seed=2)
+        for _ in range(200):
+            expr = generator.generate_single_expression(3)
+            code = codec.encode(expr)
+            self.assertTrue(all(isinstance(token, int) for token in code))
+            self.assertEqual(pickle.loads(pickle.dumps(code)), code)
+            self.assertEqual(codec.evaluate(code), expr.evaluate())
+            self.assertEqual(codec.to_string(code), expr.to_string())
+            self.assertEqual(codec.canonical_key(code), expr.canonical_key)
+            self.assertEqual(codec.decode(code).to_string(), expr.to_string())
+    
+    def test_cached_value_invalidated_on_path(self):
+        sibling = Expression(left=Expression(value=Fraction(1, 2)),
+                             right=Expression(value=Fraction(1, 3)), operator='+')
+        inner = Expression(left=Expression(value=Fraction(4, 1)),
+                           right=Expression(value=Fraction(1, 1)), operator='-')
+        root = Expression(left=inner, right=sibling, operator='×')
+        self.assertEqual(root.evaluate(), Fraction(5, 2))
+        
+        sibling_value = sibling.evaluate()
+        inner.swap_operands()
+        self.assertIsNone(root._cached_value)
+        self.assertIs(sibling.evaluate(), sibling_value)
+        with self.assertRaises(ValueError):
+            root.evaluate()
+        
+        inner.right = Expression(value=Fraction(1, 2))
+        self.assertEqual(root.evaluate(), Fraction(5, 12))
+    
+    def test_discarded_tree_freed_without_gc(self):
+        import gc
+        import weakref
+        gc.disable()
+        try:
+            leaf = Expression(value=Fraction(1, 1))
+            root = Expression(left=Expression(left=leaf, right=Expression(value=Fraction(2, 1)), operator='+'),
+                              right=Expression(value=Fraction(3, 1)), operator='×')
+            root_ref = weakref.ref(root)
+            del root
+            # 父节点只被弱引用，不形成引用环，引用计数归零即回收
+            self.assertIsNone(root_ref())
+            self.assertIsNone(leaf._parent())
+        finally:
+            gc.enable()
 
 class TestProblemGenerator(unittest.TestCase):
     """题目生成器测试"""
@@ -39,6 +188,32 @@ class TestProblemGenerator(unittest.TestCase):
         expr = generator.generate_single_expression(2)
         self.assertIsInstance(expr, Expression)
     
+    def test_leaf_pool_distribution(self):
+        # 与逐个生成时的分布一致：60% 整数，真分数先均匀选分母再均匀选分子
+        pool = get_leaf_pool(4)
+        weights = [b - a for a, b in zip([0.0] + pool.cum_weights, pool.cum_weights)]
+        expected = {Fraction(i, 1): 0.15 for i in range(4)}
+        expected.update({Fraction(1, 2): 0.4 / 3 + 0.4 / 9, Fraction(1, 3): 0.4 / 6,
+                         Fraction(2, 3): 0.4 / 6, Fraction(1, 4): 0.4 / 9, Fraction(3, 4): 0.4 / 9})
+        self.assertEqual(len(pool.values), len(expected))
+        for value, weight in zip(pool.values, weights):
+            self.assertAlmostEqual(weight, expected[value])
+        
+        import random
+        samples = pool.sample(random.Random(0), 1000, nonzero=True)
+        self.assertNotIn(Fraction(0, 1), samples)
+        self.assertTrue(all(any(sample is value for value in pool.values) for sample in samples))
+    
+    def test_large_range_skips_leaf_table(self):
+        import time
+        # 数值范围过大时不建叶子表，初始化应当很快
+        start = time.perf_counter()
+        generator = ProblemGenerator(10 ** 5, seed=1)
+        problems = generator.generate_problems(20)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(len(problems), 20)
+        self.assertFalse(hasattr(get_leaf_pool(10 ** 5), 'values'))
+    
     def test_no_negative_results(self):
         generator = ProblemGenerator(10)
         problems = generator.generate_problems(10)
@@ -46,6 +221,564 @@ class TestProblemGenerator(unittest.TestCase):
         for problem, answer in problems:
             self.assertTrue(answer.is_positive() or answer.numerator == 0)
 
+    def test_constructive_generation_always_valid(self):
+        generator = ProblemGenerator(3, constructive=True)
+        for _ in range(500):
+            expr = generator.generate_constructive_expression(3)
+            answer = expr.evaluate()
+            self.assertFalse(answer < Fraction(0, 1))
+    
+    def test_constructive_generation_beyond_retry_cap(self):
+        generator = ProblemGenerator(10, constructive=True)
+        problems = generator.generate_problems(3000)
+        self.assertEqual(len(problems), 3000)
+    
+    def test_progress_callback_and_stats(self):
+        reports = []
+        generator = ProblemGenerator(3, progress_callback=reports.append)
+        problems = generator.generate_problems(200)
+        
+        stats = generator.stats
+        self.assertTrue(stats.finished)
+        self.assertEqual(stats.accepted, len(problems))
+        self.assertEqual(stats.attempts, stats.accepted + stats.rejections['duplicate'])
+        self.assertGreater(stats.rejections['duplicate'], 0)
+        self.assertEqual(len(reports), len(problems) + 1)
+
+    def test_rejection_stats_count_discarded_candidates_only(self):
+        # 运算符数量为3的尝试都是顶层候选，子表达式的运算符更少
+        generator = ProblemGenerator(2, seed=3)
+        top_level = []
+        attempt = generator._random_expression_attempt
+        def counting_attempt(operator_count):
+            if operator_count == 3:
+                top_level.append(operator_count)
+            return attempt(operator_count)
+        generator._random_expression_attempt = counting_attempt
+
+        for _ in range(300):
+            generator.generate_single_expression(3)
+
+        self.assertGreater(len(top_level), 300)
+        self.assertEqual(sum(generator.stats.rejections.values()), len(top_level) - 300)
+
+    def test_seed_reproducible(self):
+        for constructive in (False, True):
+            first = ProblemGenerator(10, constructive, seed=7).generate_problems(30)
+            second = ProblemGenerator(10, constructive, seed=7).generate_problems(30)
+            self.assertEqual(first, second)
+        self.assertNotEqual(ProblemGenerator(10, seed=8).generate_problems(30),
+                            ProblemGenerator(10, seed=7).generate_problems(30))
+    
+    def test_targeted_generation_meets_constraints(self):
+        constraints = GenerationConstraints(Fraction(1, 1), Fraction(2, 1), 4, "+-")
+        generator = ProblemGenerator(10, seed=5, constraints=constraints)
+        problems = generator.generate_problems(50)
+        
+        self.assertEqual(len(problems), 50)
+        # 不需要丢弃不满足约束的题目
+        self.assertEqual(generator.stats.attempts - generator.stats.rejections['duplicate'], 50)
+        for problem, answer in problems:
+            self.assertTrue(Fraction(1, 1) <= answer <= Fraction(2, 1))
+            self.assertLessEqual(answer.denominator, 4)
+            self.assertNotIn('×', problem)
+            self.assertNotIn('÷', problem)
+            for operand in problem.replace('(', ' ').replace(')', ' ').split()[:-1]:
+                if operand not in '+-':
+                    self.assertLessEqual(Fraction.from_string(operand).denominator, 4)
+        
+        with self.assertRaises(ValueError):
+            ProblemGenerator(10, constraints=GenerationConstraints(Fraction(1, 20), Fraction(1, 10), 4))
+    
+    def assertNoIdentityOperations(self, expr):
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            if not node.is_leaf():
+                self.assertFalse(is_identity_operation(node.left.evaluate(), node.operator,
+                                                       node.right.evaluate()), node.to_string())
+                stack.extend((node.left, node.right))
+    
+    def test_targeted_generation_skips_identity_operations(self):
+        generator = ProblemGenerator(10, seed=2, constraints=GenerationConstraints())
+        for _ in range(500):
+            self.assertNoIdentityOperations(generator.generate_targeted_expression(3))
+    
+    def test_constraints_fall_back_to_sampling_for_large_ranges(self):
+        constraints = GenerationConstraints(Fraction(1, 1), Fraction(20, 1), None, "+-÷")
+        self.assertFalse(index_fits(100, constraints))
+        generator = ProblemGenerator(100, seed=4, constraints=constraints)
+        problems = generator.generate_problems(100)
+        
+        self.assertEqual(len(problems), 100)
+        self.assertGreater(generator.stats.rejections['constraint'], 0)
+        for problem, answer in problems:
+            self.assertTrue(Fraction(1, 1) <= answer <= Fraction(20, 1))
+            self.assertNotIn('×', problem)
+            self.assertNoIdentityOperations(expr_parser.parse(problem))
+    
+    def test_parallel_generation_no_duplicates(self):
+        generator = ProblemGenerator(10, seed=3)
+        problems = generator.generate_problems_parallel(200, workers=2)
+
+        self.assertEqual(len(problems), 200)
+        self.assertEqual(len(generator.generated_expressions), 200)
+        # 固定种子时并行结果可复现
+        self.assertEqual(ProblemGenerator(10, seed=3).generate_problems_parallel(200, workers=2), problems)
+    
+    def test_shortfall_hint_matches_space_size(self):
+        for number_range, hint, other in ((2, '--exhaustive', '--constructive'), (10, '--constructive', '--exhaustive')):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                ProblemGenerator(number_range, seed=1).generate_problems(6000)
+            self.assertIn(hint, output.getvalue())
+            self.assertNotIn(other, output.getvalue())
+    
+    def test_resume_keeps_existing_after_parallel_retry(self):
+        existing = [problem for problem, _ in ProblemGenerator(3, seed=5).generate_problems(300)]
+        generator = ProblemGenerator(3, seed=6)
+        generator.load_existing(existing)
+        # 题目空间小，并行生成数量不足时会清空缓存重试，已有题目不能再次出现
+        problems = generator.generate_with_retry(900, max_retry=1, workers=2)
+        keys = [expr_parser.parse(problem).canonical_key for problem in existing + [p for p, _ in problems]]
+        self.assertEqual(len(keys), len(set(keys)))
+    
+    def test_parallel_shares_attempt_budget(self):
+        # 默认模式下串行和并行共用 max_retry_count 次尝试，进程数不改变生成数量的上限
+        for workers in (1, 2):
+            generator = ProblemGenerator(10, seed=1)
+            problems = generator.generate_with_retry(5000, max_retry=1, workers=workers)
+            self.assertLessEqual(generator.stats.attempts, generator.max_retry_count)
+            self.assertLessEqual(len(problems), generator.max_retry_count)
+
+class TestExpressionParser(unittest.TestCase):
+    """表达式解析器测试"""
+    
+    def test_precedence_and_parentheses(self):
+        self.assertEqual(expr_parser.evaluate("6 - 1/3 × 3 ="), Fraction(5, 1))
+        self.assertEqual(expr_parser.evaluate("3 × (1 + 2)"), Fraction(9, 1))
+    
+    def test_mixed_number(self):
+        self.assertEqual(expr_parser.evaluate("2^1/2 - 1/2"), Fraction(2, 1))
+        self.assertEqual(expr_parser.evaluate("1^1/3 ÷ 2/3"), Fraction(2, 1))
+    
+    def test_round_trip_generated_problems(self):
+        generator = ProblemGenerator(10)
+        for problem, answer in generator.generate_problems(50):
+            self.assertEqual(expr_parser.evaluate(problem), answer)
+            # 直接求值与先建树再求值的结果一致
+            self.assertEqual(expr_parser.parse(problem).evaluate(), answer)
+    
+    def test_evaluate_rejects_invalid_operations(self):
+        # 不建树的求值与表达式树使用相同的规则
+        with self.assertRaises(ValueError):
+            expr_parser.evaluate("1 - (1 + 1) =")
+        with self.assertRaises(ValueError):
+            expr_parser.evaluate("1 ÷ (1 - 1) =")
+        with self.assertRaises(ValueError):
+            expr_parser.evaluate("1 + 2 3")
+    
+    def test_invalid_expression(self):
+        with self.assertRaises(ValueError):
+            expr_parser.parse("1 + (2 × 3")
+        with self.assertRaises(ValueError):
+            expr_parser.parse("1 + a")
+
+class TestEnumerator(unittest.TestCase):
+    """题目枚举测试"""
+    
+    def test_enumeration_unique_and_complete(self):
+        keys = [expr.canonical_key for expr in enumerator.enumerate_expressions(2, max_operators=2)]
+        key_set = set(keys)
+        self.assertEqual(len(keys), len(key_set))
+        
+        generator = ProblemGenerator(2)
+        for _ in range(300):
+            expr = generator.generate_single_expression(2)
+            self.assertIn(expr.canonical_key, key_set)
+    
+    def test_exhaustive_generation_exports_all(self):
+        total = enumerator.count_expressions(2, max_operators=1)
+        generator = ProblemGenerator(2)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            problems = generator.generate_exhaustive(total + 10, max_operators=1)
+        self.assertEqual(len(problems), total)
+        self.assertIn(f"共有 {total} 道题目，去重和历史过滤后导出 {total} 道", output.getvalue())
+        for problem, answer in problems:
+            self.assertEqual(expr_parser.evaluate(problem), answer)
+        
+        # 已生成过的题目被去重后，题目空间大小和导出数量分别报告
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(generator.generate_exhaustive(total + 10, max_operators=1), [])
+        self.assertIn(f"共有 {total} 道题目，去重和历史过滤后导出 0 道", output.getvalue())
+
+class TestProblemWriter(unittest.TestCase):
+    """题目文件写出测试"""
+    
+    def test_resume_after_partial_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            generator = ProblemGenerator(10)
+            writer = ProblemWriter(exercise_file, answer_file, batch_size=2)
+            writer.prepare()
+            self.assertEqual(writer.write(generator.iter_problems(5)), 5)
+            
+            # 模拟中断：题目文件多写了一行和半行
+            with open(exercise_file, 'a', encoding='utf-8') as f:
+                f.write("6. 1 + 1 =\n7. 2 ")
+            
+            generator = ProblemGenerator(10)
+            writer = ProblemWriter(exercise_file, answer_file, resume=True)
+            self.assertEqual(writer.prepare(), 5)
+            self.assertEqual(generator.load_existing(writer.existing_exercises()), 5)
+            self.assertEqual(writer.write(generator.iter_problems(3)), 8)
+            
+            with open(exercise_file, encoding='utf-8') as f:
+                exercises = f.read().splitlines()
+            with open(answer_file, encoding='utf-8') as f:
+                answers = f.read().splitlines()
+            self.assertEqual([line.split('.')[0] for line in exercises], [str(i) for i in range(1, 9)])
+            self.assertEqual(len(answers), 8)
+            self.assertEqual(len(generator.generated_expressions), 8)
+            result = AnswerChecker().check_answers(exercise_file, answer_file)
+            self.assertEqual(result['correct_count'], 8)
+
+class TestProblemHistory(unittest.TestCase):
+    """题目历史测试"""
+    
+    def test_no_repeats_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'history.bin')
+            with ProblemHistory(path, capacity=1000, fp_rate=0.001) as history:
+                generator = ProblemGenerator(10, history=history)
+                first = {problem for problem, _ in generator.generate_problems(50)}
+                self.assertEqual(generator.commit_history(), 50)
+            
+            with ProblemHistory(path) as history:
+                self.assertEqual(len(history), 50)
+                generator = ProblemGenerator(10, history=history)
+                second = {problem for problem, _ in generator.generate_problems(50)}
+            self.assertEqual(len(second), 50)
+            self.assertFalse(first & second)
+    
+    def test_rejects_other_key_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'history.bin')
+            ProblemHistory(path, capacity=100).close()
+            with open(path, 'r+b') as f:
+                f.seek(4)
+                f.write(b'\xff\xff')
+            with self.assertRaises(ValueError):
+                ProblemHistory(path)
+
+class TestWorksheetCache(unittest.TestCase):
+    """生成结果缓存测试"""
+    
+    def test_round_trip_and_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            ProblemWriter(exercise_file, answer_file).write(
+                ProblemGenerator(10, seed=1).iter_problems(200))
+            with open(exercise_file, 'rb') as f1, open(answer_file, 'rb') as f2:
+                expected = (f1.read(), f2.read())
+            
+            cache = WorksheetCache(os.path.join(tmp, 'cache'))
+            key = WorksheetCache.make_key({'n': 200, 'r': 10, 'seed': 1})
+            self.assertIsNone(cache.fetch(key, exercise_file, answer_file))
+            cache.store(key, exercise_file, answer_file, 200)
+            
+            out_exercise = os.path.join(tmp, 'OutExercises.txt')
+            out_answer = os.path.join(tmp, 'OutAnswers.txt')
+            self.assertEqual(cache.fetch(key, out_exercise, out_answer), 200)
+            with open(out_exercise, 'rb') as f1, open(out_answer, 'rb') as f2:
+                self.assertEqual((f1.read(), f2.read()), expected)
+            
+            # 超过大小上限时只保留最近存入的一项
+            cache.max_bytes = 1
+            other_key = WorksheetCache.make_key({'n': 200, 'r': 10, 'seed': 2})
+            os.utime(cache._path(key), (0, 0))
+            cache.store(other_key, exercise_file, answer_file, 200)
+            self.assertIsNone(cache.fetch(key, out_exercise, out_answer))
+            self.assertEqual(cache.fetch(other_key, out_exercise, out_answer), 200)
+
+class TestProblemSet(unittest.TestCase):
+    """二进制题目集测试"""
+    
+    def test_round_trip_and_render(self):
+        problems = ProblemGenerator(10, seed=4).generate_problems(120)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'problems.bin')
+            expressions = ProblemGenerator(10, seed=4).iter_expressions(120)
+            self.assertEqual(write_problem_set(path, expressions), 120)
+            
+            with ProblemSet(path) as problem_set:
+                self.assertEqual(len(problem_set), 120)
+                self.assertEqual(problem_set.problem(-1), problems[-1][0])
+                self.assertEqual(problem_set.answer(5), problems[5][1])
+                self.assertEqual(problem_set.expression(7).evaluate(), problems[7][1])
+                self.assertEqual(list(problem_set), problems)
+    
+    def test_uses_postfix_codec_encoding(self):
+        big = Fraction(10 ** 12, 7)
+        expr = expr_parser.parse(f"{big.to_string()} ÷ (3 - 1/2) + 3")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'problems.bin')
+            write_problem_set(path, [(expr, expr.evaluate())])
+            with ProblemSet(path) as problem_set:
+                # 文件中的题目就是 PostfixCodec 的后缀形式，叶子序号指向文件自带的叶子表
+                codec = PostfixCodec(problem_set._codec.leaves)
+                self.assertEqual(tuple(problem_set._code(0)), codec.encode(expr))
+                self.assertEqual(problem_set.problem(0), f"{expr.to_string()} =")
+                self.assertEqual(problem_set.expression(0).canonical_key, expr.canonical_key)
+
+class TestAnswerChecker(unittest.TestCase):
+    """答案批改器测试"""
+    
+    def test_check_sample_files(self):
+        checker = AnswerChecker()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        result = checker.check_answers(os.path.join(base_dir, 'exercises.txt'),
+                                       os.path.join(base_dir, 'answers.txt'))
+        self.assertEqual(result['correct_count'], 10)
+        self.assertEqual(result['wrong_indices'], [])
+    
+    def test_decimal_answers_are_exact(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 ÷ 2 =\n2. 1 ÷ 10 =\n3. 1 ÷ 3 =\n4. 3 ÷ 4 =\n")
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                f.write("1. 0.5\n2. 0.1\n3. 0.3333333333333333\n4. .75\n")
+            
+            for vectorized in (False, True):
+                result = AnswerChecker().check_answers(exercise_file, answer_file, vectorized=vectorized)
+                self.assertEqual(result['correct_indices'], [1, 2, 4])
+                self.assertEqual(result['wrong_indices'], [3])
+    
+    def test_vectorized_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 2 =\n2. 5 - 3 =\n3. 2 × 3 =\n4. 1/2 ÷ 2 =\n5. 1 ÷ 0 =\n")
+                f.write(f"6. {10 ** 30} × {10 ** 30} =\n")
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                f.write(f"1. 3\n2. 3\n3. 6\n5. 1\n6. {10 ** 60}\n")
+            
+            checker = AnswerChecker()
+            serial = checker.check_answers(exercise_file, answer_file)
+            vectorized = checker.check_answers(exercise_file, answer_file, vectorized=True)
+            self.assertEqual(serial, vectorized)
+            self.assertEqual(vectorized['correct_indices'], [1, 3, 6])
+    
+    def test_parallel_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            writer = ProblemWriter(exercise_file, answer_file)
+            writer.prepare()
+            writer.write(ProblemGenerator(10).iter_problems(300))
+            # 改错部分答案
+            with open(answer_file, encoding='utf-8') as f:
+                lines = f.readlines()
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                for i, line in enumerate(lines):
+                    f.write(f"{i + 1}. 12345\n" if i % 7 == 0 else line)
+            
+            serial_file = os.path.join(tmp, 'Serial.txt')
+            parallel_file = os.path.join(tmp, 'Parallel.txt')
+            checker = AnswerChecker()
+            serial = checker.check_answers(exercise_file, answer_file)
+            checker.save_grade_result(serial_file)
+            checker = AnswerChecker()
+            parallel = checker.check_answers(exercise_file, answer_file, workers=2)
+            checker.save_grade_result(parallel_file)
+            
+            self.assertEqual(serial, parallel)
+            with open(serial_file, 'rb') as f1, open(parallel_file, 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+            
+            # 使用标准答案缓存时同样并行批改，结果不变
+            cache = AnswerKeyCache(os.path.join(tmp, 'cache'))
+            for _ in range(2):
+                self.assertEqual(AnswerChecker(cache).check_answers(exercise_file, answer_file, workers=2), serial)
+    
+    def test_answer_key_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 2 =\n2. 1/2 ÷ 2 =\n3. 1 ÷ 0 =\n")
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                f.write("1. 3\n2. 1/4\n3. 0\n")
+            cache = AnswerKeyCache(os.path.join(tmp, 'cache'))
+            
+            first = AnswerChecker(cache).check_answers(exercise_file, answer_file)
+            self.assertEqual(len(os.listdir(cache.cache_dir)), 1)
+            
+            # 命中缓存时不再计算题目
+            checker = AnswerChecker(cache)
+            checker._calculate_expression = None
+            self.assertEqual(checker.check_answers(exercise_file, answer_file), first)
+            self.assertEqual(first['correct_indices'], [1, 2])
+            
+            # 题目文件改变后缓存失效
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 3 =\n2. 1/2 ÷ 2 =\n3. 1 ÷ 1 =\n")
+            result = AnswerChecker(cache).check_answers(exercise_file, answer_file)
+            self.assertEqual(result['correct_indices'], [2])
+    
+    def test_check_submissions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 2 =\n2. 5 - 3 =\n")
+            submissions = {'alice': "1. 3\n2. 2\n", 'bob': "1. 3\n2. 1\n"}
+            answer_files = []
+            for name, content in submissions.items():
+                answer_files.append(os.path.join(tmp, f'{name}.txt'))
+                with open(answer_files[-1], 'w', encoding='utf-8') as f:
+                    f.write(content)
+            
+            output_dir = os.path.join(tmp, 'grades')
+            result = AnswerChecker().check_submissions(exercise_file, answer_files, output_dir)
+            
+            self.assertEqual(result['question_accuracy'], {1: 1.0, 2: 0.5})
+            with open(os.path.join(output_dir, 'Grade_bob.txt'), encoding='utf-8') as f:
+                self.assertEqual(f.read(), "Correct: 1 (1)\nWrong: 1 (2)")
+            with open(result['report_file'], encoding='utf-8') as f:
+                self.assertEqual(f.read(), "Submissions: 2\n1. 2/2 (100.0%)\n2. 1/2 (50.0%)\n")
+    
+    def test_check_submissions_per_student_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 2 =\n")
+            answer_files = []
+            for name, content in (('alice', "1. 3\n"), ('bob', "1. 4\n")):
+                os.makedirs(os.path.join(tmp, 'subs', name))
+                answer_files.append(os.path.join(tmp, 'subs', name, 'Answers.txt'))
+                with open(answer_files[-1], 'w', encoding='utf-8') as f:
+                    f.write(content)
+            
+            output_dir = os.path.join(tmp, 'grades')
+            result = AnswerChecker().check_submissions(exercise_file, answer_files, output_dir)
+            
+            self.assertEqual(sorted(result['submissions']), ['alice_Answers', 'bob_Answers'])
+            self.assertEqual(sorted(os.listdir(output_dir)),
+                             ['Grade_alice_Answers.txt', 'Grade_bob_Answers.txt', 'Report.txt'])
+            self.assertEqual(result['question_accuracy'], {1: 0.5})
+            
+            # 去掉扩展名后同名的答案文件无法区分
+            duplicate = os.path.join(tmp, 'subs', 'alice', 'Answers.md')
+            with open(duplicate, 'w', encoding='utf-8') as f:
+                f.write("1. 3\n")
+            with self.assertRaises(ValueError):
+                AnswerChecker().check_submissions(exercise_file, answer_files + [duplicate], output_dir)
+    
+    def test_streaming_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.write("1. 1 + 2 =\n2. 5 - 3 =\n3. 2 × 3 =\n4. 1/2 ÷ 2 =\n")
+            # 答案顺序打乱，且缺少第4题
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                f.write("2. 2\n1. 3\n3. 5\n")
+            
+            serial_file = os.path.join(tmp, 'Serial.txt')
+            stream_file = os.path.join(tmp, 'Stream.txt')
+            checker = AnswerChecker()
+            checker.check_answers(exercise_file, answer_file)
+            checker.save_grade_result(serial_file)
+            result = checker.check_answers_streaming(exercise_file, answer_file, stream_file, chunk_size=1)
+            
+            self.assertEqual(result['correct_count'], 2)
+            self.assertEqual(result['total_count'], 4)
+            with open(serial_file, encoding='utf-8') as f1, open(stream_file, encoding='utf-8') as f2:
+                self.assertEqual(f1.read(), f2.read())
+    
+    def test_streaming_missing_answer_keeps_memory_flat(self):
+        import tracemalloc
+        count = 20000
+        with tempfile.TemporaryDirectory() as tmp:
+            exercise_file = os.path.join(tmp, 'Exercises.txt')
+            answer_file = os.path.join(tmp, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f:
+                f.writelines(f"{i}. {i} + 1 =\n" for i in range(1, count + 1))
+            # 缺少第1题的答案，之后的答案与题目错开一行
+            with open(answer_file, 'w', encoding='utf-8') as f:
+                f.writelines(f"{i}. {i + 1}\n" for i in range(2, count + 1))
+            
+            tracemalloc.start()
+            try:
+                result = AnswerChecker().check_answers_streaming(exercise_file, answer_file,
+                                                                 os.path.join(tmp, 'Grade.txt'), chunk_size=100)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            
+            self.assertEqual(result['correct_count'], count - 1)
+            self.assertEqual(result['wrong_count'], 1)
+            # 未配对的题目不会一直缓存，峰值内存与题目数量无关
+            self.assertLess(peak, 512 * 1024)
+
+class TestServer(unittest.TestCase):
+    """服务测试"""
+    
+    def test_generate_and_grade_over_http(self):
+        async def request(port, method, path, payload=None, length=None):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+            length = len(body) if length is None else length
+            writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode() + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, _, data = response.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(data)
+        
+        async def scenario():
+            service = ExerciseService(max_generators=2)
+            server = ExerciseServer(service, workers=2)
+            listener = await server.start('127.0.0.1', 0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                # 并发的生成请求共享同一个生成器，各自的题目互不重复
+                responses = await asyncio.gather(
+                    request(port, 'POST', '/generate', {'n': 20, 'r': 10}),
+                    request(port, 'POST', '/generate', {'n': 20, 'r': 10}))
+                grade = await request(port, 'POST', '/grade', {
+                    'exercises': ["1. 1 + 2 =", "2. 5 - 3 ="], 'answers': ["1. 3", "2. 1"]})
+                for number_range in (11, 12, 13):
+                    await request(port, 'POST', '/generate', {'n': 1, 'r': number_range})
+                generators = len(service._generators)
+                errors = [await request(port, 'POST', '/generate', {'n': 'x', 'r': 10}),
+                          await request(port, 'POST', '/generate', {'n': 1, 'r': 10 ** 9}),
+                          await request(port, 'POST', '/generate', {'n': 1, 'r': 10}, length='abc'),
+                          await request(port, 'GET', '/missing')]
+            finally:
+                listener.close()
+                await listener.wait_closed()
+                server.executor.shutdown()
+            return responses, grade, errors, generators
+        
+        responses, grade, errors, generators = asyncio.run(scenario())
+        self.assertEqual([status for status, _ in responses], [200, 200])
+        for _, body in responses:
+            problems = [p['exercise'] for p in body['problems']]
+            self.assertEqual(len(problems), 20)
+            self.assertEqual(len(set(problems)), 20)
+        self.assertEqual(generators, 2)
+        self.assertEqual(grade[0], 200)
+        self.assertEqual(grade[1]['correct_indices'], [1])
+        self.assertEqual([status for status, _ in errors], [400, 400, 400, 404])
+
 def run_example():
     """运行示例"""
     print("=== 小学四则运算题目生成器示例 ===\n")
@@ -59,8 +792,8 @@ def run_example():
     print("   python main.py -e Exercises.txt -a Answers.txt")
     
     # 示例3: 性能测试
-    print("\n3. 性能测试（生成1000道题目）:")
-    print("   python main.py -n 1000 -r 20")
+    print("\n3. 性能测试（基准测试套件，与基线对比）:")
+    print("   python benchmark.py suite")
     
     print("\n=== 测试用例执行 ===")
     
@@ -1,54 +1,27 @@
 import random
-import re
 from typing import Union, List
 from fraction import Fraction
+import expr_parser
+from leaf_pool import get_leaf_pool
 
 def safe_eval(expression: str) -> Fraction:
     """
     安全地计算表达式值
     
     Args:
-        expression: 表达式字符串
+        expression: 表达式字符串，支持 ×、÷、带分数 a^b/c 和括号
         
     Returns:
         计算结果
     """
-    # 移除所有空格
-    expr = expression.replace(' ', '')
-    
-    # 验证表达式只包含允许的字符
-    if not re.match(r'^[\d\+\-\*\/\(\)\.]+$', expr):
-        raise ValueError("表达式包含非法字符")
-    
-    # 简单的表达式求值（生产环境应该使用更安全的方法）
     try:
-        # 替换分数表示
-        expr = expr.replace('^', '+')  # 临时处理带分数
-        
-        # 使用Python的eval（注意：在生产环境中应该使用更安全的方法）
-        result = eval(expr)
-        
-        if isinstance(result, int):
-            return Fraction(result, 1)
-        elif isinstance(result, float):
-            # 将浮点数转换为分数
-            from fractions import Fraction as PyFraction
-            py_frac = PyFraction(result).limit_denominator(1000)
-            return Fraction(py_frac.numerator, py_frac.denominator)
-        else:
-            raise ValueError("无法计算表达式")
-            
-    except Exception as e:
+        return expr_parser.evaluate(expression)
+    except (ValueError, ZeroDivisionError) as e:
         raise ValueError(f"表达式计算错误: {e}")
 
-def generate_random_fraction(max_value: int) -> Fraction:
-    """生成随机分数"""
-    if random.random() < 0.6:
-        return Fraction(random.randint(0, max_value - 1), 1)
-    else:
-        denominator = random.randint(2, max_value)
-        numerator = random.randint(1, denominator - 1)
-        return Fraction(numerator, denominator)
+def generate_random_fraction(max_value: int, rng: random.Random = None) -> Fraction:
+    """生成随机分数（60%整数，40%真分数），rng 为随机数生成器，默认使用 random 模块"""
+    return get_leaf_pool(max_value).sample(rng or random)[0]
 
 def parse_expression(expr: str) -> Union[int, Fraction]:
     """解析表达式结果为整数或分数"""
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, Optional
+
+_MAGIC = b'WSC1'
+_HEADER = struct.Struct('<4sQQ')  # 魔数, 题目数量, 压缩后的题目文件长度
+_CHUNK_SIZE = 1 << 20
+
+
+class WorksheetCache:
+    """
+    生成结果缓存
+
+    以生成参数（含随机种子）的哈希为键，每套题目对应一个缓存文件，
+    依次保存 zlib 压缩后的题目文件和答案文件。命中时分块解压直接写出，
+    不重新生成；缓存总大小超过上限时按最近使用时间清理。
+    """
+
+    def __init__(self, cache_dir: str = '.worksheet_cache', max_bytes: int = 256 << 20):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存文件的总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        """
+        计算生成参数的缓存键
+
+        Args:
+            params: 决定生成结果的全部参数，如题目数量、数值范围、随机种子和生成模式
+
+        Returns:
+            缓存键
+        """
+        data = json.dumps(params, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.ws')
+
+    def fetch(self, key: str, exercise_file: str, answer_file: str) -> Optional[int]:
+        """
+        将缓存的题目和答案写出到文件
+
+        Args:
+            key: 缓存键
+            exercise_file: 题目文件路径
+            answer_file: 答案文件路径
+
+        Returns:
+            题目数量，未命中或缓存损坏时返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                magic, count, exercise_length = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                self._decompress_to(f, exercise_length, exercise_file)
+                self._decompress_to(f, None, answer_file)
+        except (OSError, struct.error, zlib.error):
+            return None
+
+        # 更新访问时间，用于按最近使用清理
+        os.utime(path)
+        return count
+
+    @staticmethod
+    def _decompress_to(source, length: Optional[int], path: str):
+        """从 source 读取 length 字节（None 表示到文件末尾）的压缩数据，解压写入 path"""
+        decompressor = zlib.decompressobj()
+        with open(path, 'wb') as out:
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = source.read(_CHUNK_SIZE if remaining is None else min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                out.write(decompressor.decompress(chunk))
+            out.write(decompressor.flush())
+        if remaining or not decompressor.eof:
+            raise zlib.error("缓存文件不完整")
+
+    def store(self, key: str, exercise_file: str, answer_file: str, count: int):
+        """
+        将生成的题目和答案文件存入缓存
+
+        Args:
+            key: 缓存键
+            exercise_file: 题目文件路径
+            answer_file: 答案文件路径
+            count: 题目数量
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, count, 0))
+            exercise_length = self._compress_from(exercise_file, f)
+            self._compress_from(answer_file, f)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, count, exercise_length))
+        os.replace(temp_path, path)
+
+        self._evict()
+
+    @staticmethod
+    def _compress_from(path: str, out) -> int:
+        """分块压缩 path 的内容写入 out，返回压缩后的长度"""
+        compressor = zlib.compressobj(6)
+        length = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                data = compressor.compress(chunk)
+                out.write(data)
+                length += len(data)
+        data = compressor.flush()
+        out.write(data)
+        return length + len(data)
+
+    def _evict(self):
+        """缓存总大小超过上限时删除最久未使用的文件"""
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if name.endswith('.ws')]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        total = 0
+        for path in entries:
+            total += os.path.getsize(path)
+            # 最近存入的一项总是保留
+            if total > self.max_bytes and path != entries[0]:
+                os.remove(path)
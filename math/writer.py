@@ -0,0 +1,137 @@
+import os
+from typing import Iterable, Iterator, Tuple
+from fraction import Fraction
+
+_READ_CHUNK_SIZE = 1 << 20
+
+
+def _count_complete_lines(path: str) -> int:
+    """统计文件中以换行符结尾的完整行数，文件不存在时返回0"""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK_SIZE), b''):
+            count += chunk.count(b'\n')
+    return count
+
+
+def _offset_after_lines(path: str, line_count: int) -> int:
+    """返回文件中前 line_count 行结束处的字节偏移"""
+    if line_count == 0:
+        return 0
+    offset = 0
+    remaining = line_count
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK_SIZE), b''):
+            newlines = chunk.count(b'\n')
+            if newlines < remaining:
+                remaining -= newlines
+                offset += len(chunk)
+                continue
+            position = -1
+            for _ in range(remaining):
+                position = chunk.index(b'\n', position + 1)
+            return offset + position + 1
+    return offset
+
+
+class ProblemWriter:
+    """题目和答案文件写出器，单遍流式写出两个文件，按批缓冲，支持断点续写"""
+
+    def __init__(self, exercise_file: str = 'Exercises.txt', answer_file: str = 'Answers.txt',
+                 batch_size: int = 10000, resume: bool = False):
+        """
+        初始化写出器
+
+        Args:
+            exercise_file: 题目文件路径
+            answer_file: 答案文件路径
+            batch_size: 每批写出的题目数量
+            resume: 是否在已有文件后续写
+        """
+        self.exercise_file = exercise_file
+        self.answer_file = answer_file
+        self.batch_size = batch_size
+        self.resume = resume
+        self.written_count = 0
+
+    def prepare(self) -> int:
+        """
+        准备输出文件
+
+        续写时只保留两个文件中都已完整写出的题目，截掉中断时留下的不完整部分；
+        否则清空两个文件。
+
+        Returns:
+            已有的题目数量
+        """
+        if not self.resume:
+            for path in (self.exercise_file, self.answer_file):
+                open(path, 'w', encoding='utf-8').close()
+            self.written_count = 0
+            return 0
+
+        count = min(_count_complete_lines(self.exercise_file),
+                    _count_complete_lines(self.answer_file))
+        for path in (self.exercise_file, self.answer_file):
+            if os.path.exists(path):
+                offset = _offset_after_lines(path, count)
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+            else:
+                open(path, 'w', encoding='utf-8').close()
+        self.written_count = count
+        return count
+
+    def existing_exercises(self) -> Iterator[str]:
+        """逐行读取已写出的题目，用于续写时恢复去重状态"""
+        if not os.path.exists(self.exercise_file):
+            return
+        with open(self.exercise_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                _, _, problem = line.partition('. ')
+                if problem.strip():
+                    yield problem.strip()
+
+    def write(self, problems: Iterable[Tuple[str, Fraction]]) -> int:
+        """
+        从可迭代对象中逐个取出题目并写出，题目只需在写出前存在于内存中
+
+        每批先写题目文件再写答案文件并立即刷新，中断后最多丢失最后一批，
+        可通过 resume 续写。
+
+        Args:
+            problems: 题目和答案的可迭代对象（列表或生成器）
+
+        Returns:
+            文件中的题目总数
+        """
+        with open(self.exercise_file, 'a', encoding='utf-8', buffering=_READ_CHUNK_SIZE) as ef, \
+                open(self.answer_file, 'a', encoding='utf-8', buffering=_READ_CHUNK_SIZE) as af:
+            exercise_lines = []
+            answer_lines = []
+            index = self.written_count
+
+            for problem, answer in problems:
+                index += 1
+                exercise_lines.append(f"{index}. {problem}\n")
+                answer_lines.append(f"{index}. {answer.to_string()}\n")
+                if len(exercise_lines) >= self.batch_size:
+                    self._flush_batch(ef, af, exercise_lines, answer_lines)
+                    self.written_count = index
+                    exercise_lines = []
+                    answer_lines = []
+
+            if exercise_lines:
+                self._flush_batch(ef, af, exercise_lines, answer_lines)
+                self.written_count = index
+
+        return self.written_count
+
+    def _flush_batch(self, ef, af, exercise_lines, answer_lines):
+        """写出一批题目和答案"""
+        ef.write(''.join(exercise_lines))
+        ef.flush()
+        af.write(''.join(answer_lines))
+        af.flush()